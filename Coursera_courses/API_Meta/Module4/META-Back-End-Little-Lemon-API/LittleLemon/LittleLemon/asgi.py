@@ -3,6 +3,9 @@ ASGI config for LittleLemon project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with an ASGI server (e.g. ``uvicorn LittleLemon.asgi:application``)
+for the long-lived /api/orders/stream responses.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.1/howto/deployment/asgi/
 """
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,6 +46,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "LittleLemonAPI.middleware.MetricsMiddleware",
+    "LittleLemonAPI.middleware.ReplicaRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -85,6 +88,94 @@ DATABASES = {
     }
 }
 
+if os.environ.get("LITTLELEMON_DB") == "postgres":
+    DATABASES["default"] = {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": os.environ.get("POSTGRES_DB", "littlelemon"),
+        "USER": os.environ.get("POSTGRES_USER", "littlelemon"),
+        "PASSWORD": os.environ.get("POSTGRES_PASSWORD", ""),
+        "HOST": os.environ.get("POSTGRES_HOST", "localhost"),
+        "PORT": os.environ.get("POSTGRES_PORT", "5432"),
+    }
+
+# Read replicas
+# GET, HEAD and OPTIONS requests read from LITTLELEMON_READ_REPLICAS.
+# LITTLELEMON_REPLICA_LAG is the longest replication delay expected, in
+# seconds: a client that wrote reads from the primary that long afterwards.
+# Without LITTLELEMON_SHARED_CACHE the replicas are left unused.
+# Replicas come from POSTGRES_REPLICA_HOSTS, or LITTLELEMON_SQLITE_REPLICAS
+# (paths of copies of the SQLite file) for local testing.
+
+DATABASE_ROUTERS = ["LittleLemonAPI.routers.ReplicaRouter"]
+LITTLELEMON_READ_REPLICAS = []
+LITTLELEMON_REPLICA_LAG = 5
+
+if DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql":
+    replicas = os.environ.get("POSTGRES_REPLICA_HOSTS", "")
+    replicas = [{"HOST": host} for host in replicas.split(",") if host]
+else:
+    replicas = os.environ.get("LITTLELEMON_SQLITE_REPLICAS", "")
+    replicas = [{"NAME": name} for name in replicas.split(",") if name]
+
+for number, replica in enumerate(replicas, 1):
+    # tests read the replicas from the test database of the primary
+    DATABASES[f"replica{number}"] = {
+        **DATABASES["default"],
+        **replica,
+        "TEST": {"MIRROR": "default"},
+    }
+    LITTLELEMON_READ_REPLICAS.append(f"replica{number}")
+
+# SQLite tuned for concurrent requests: readers don't block the writer (WAL),
+# a writer waits up to `timeout` seconds for the lock instead of failing, and
+# takes it when the transaction starts, so checkouts queue instead of
+# deadlocking on a lock upgrade. synchronous=NORMAL is durable in WAL mode
+# except for the last transactions on power loss. transaction_mode and
+# init_command need Django 5.1.
+LITTLELEMON_SQLITE_OPTIONS = {
+    "timeout": 20,
+    "transaction_mode": "IMMEDIATE",
+    "init_command": "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;",
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+# Without REDIS_URL every process keeps its own in-memory caches.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "catalog": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "catalog",
+    },
+    "throttle": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "throttle",
+    },
+}
+
+if os.environ.get("REDIS_URL"):
+    # shared by all worker processes
+    for alias in ("catalog", "throttle"):
+        CACHES[alias] = {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+            "KEY_PREFIX": alias,
+        }
+
+LITTLELEMON_CATALOG_CACHE = "catalog"
+LITTLELEMON_THROTTLE_CACHE = "throttle"
+LITTLELEMON_CATALOG_CACHE_TIMEOUT = 300
+# The table versions behind the response cache, the ETags and the cached
+# user roles live in the catalog cache. They are only used when every
+# process sees the same one: with REDIS_URL, or when a single process serves
+# the API (the development server). Production without REDIS_URL turns
+# them off, see below.
+LITTLELEMON_SHARED_CACHE = True
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
@@ -145,8 +236,8 @@ REST_FRAMEWORK = {
     "PAGE_SIZE": 10,
 
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "LittleLemonAPI.throttles.AnonSlidingWindowThrottle",
+        "LittleLemonAPI.throttles.UserSlidingWindowThrottle",
     ],
     
     "DEFAULT_AUTHENTICATION_CLASSES":[
@@ -162,9 +253,84 @@ REST_FRAMEWORK = {
     "DEFAULT_THROTTLE_RATES": {
         "anon": "2/minute",
         "user": "200/minute",
+        "checkout": "10/minute",
+        "menu": "120/minute",
     },
 }
 
+# Request metrics
+# Share of requests measured by LittleLemonAPI.middleware.MetricsMiddleware,
+# and whether measured responses carry a Server-Timing header.
+
+LITTLELEMON_METRICS_SAMPLE_RATE = 1.0
+LITTLELEMON_METRICS_SERVER_TIMING = True
+
+# Deployment profile
+# LITTLELEMON_ENV=production serves JSON only, encoded by orjson when it is
+# installed, and leaves out the browsable API and XML renderers. Database
+# connections are persistent and SQLite runs with LITTLELEMON_SQLITE_OPTIONS.
+
+LITTLELEMON_ENV = os.environ.get("LITTLELEMON_ENV", "development")
+
+if LITTLELEMON_ENV == "production":
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = [
+        "LittleLemonAPI.renderers.FastJSONRenderer",
+    ]
+    LITTLELEMON_METRICS_SAMPLE_RATE = float(
+        os.environ.get("LITTLELEMON_METRICS_SAMPLE_RATE", 0.05)
+    )
+    # several workers, each with its own in-memory caches unless REDIS_URL
+    LITTLELEMON_SHARED_CACHE = bool(os.environ.get("REDIS_URL"))
+
+    for database in DATABASES.values():
+        # keep connections open between requests, checked before reuse
+        database["CONN_MAX_AGE"] = int(os.environ.get("LITTLELEMON_CONN_MAX_AGE", 60))
+        database["CONN_HEALTH_CHECKS"] = True
+        if database["ENGINE"] == "django.db.backends.sqlite3":
+            database["OPTIONS"] = LITTLELEMON_SQLITE_OPTIONS
+        elif os.environ.get("LITTLELEMON_DB_POOL_SIZE"):
+            # a psycopg connection pool per process replaces persistent connections
+            database["CONN_MAX_AGE"] = 0
+            database["OPTIONS"] = {
+                "pool": {
+                    "min_size": 2,
+                    "max_size": int(os.environ["LITTLELEMON_DB_POOL_SIZE"]),
+                }
+            }
+
+# Order events
+# Dotted paths of functions that receive batches of OutboxEvents from the
+# process_outbox worker.
+
+LITTLELEMON_EVENT_HANDLERS = [
+    # daily sales rollups behind /api/reports/*
+    "LittleLemonAPI.rollups.update_rollups",
+    # /api/orders/stream
+    "LittleLemonAPI.dispatch.push_order_events",
+    # gives new orders to the least loaded delivery crew
+    "LittleLemonAPI.balancer.balance_orders",
+]
+LITTLELEMON_OUTBOX_RETENTION_DAYS = 7
+# seconds before the balancer reads the open orders per crew again
+LITTLELEMON_CREW_LOAD_REFRESH = 60
+# delivered orders older than this many days go to the archive tables
+# (archive_orders command) and are only read with ?history=true
+LITTLELEMON_ARCHIVE_AFTER_DAYS = 365
+
+# Order streams
+# The broker carries order events from the process_outbox worker to the
+# processes serving /api/orders/stream. The in-memory broker only reaches
+# streams in the worker's own process; with REDIS_URL it is Redis pub/sub.
+
+LITTLELEMON_BROKER = {"BACKEND": "LittleLemonAPI.brokers.InMemoryBroker"}
+if os.environ.get("REDIS_URL"):
+    LITTLELEMON_BROKER = {
+        "BACKEND": "LittleLemonAPI.brokers.RedisBroker",
+        "LOCATION": os.environ["REDIS_URL"],
+    }
+# seconds between keepalive comments on an idle stream
+LITTLELEMON_STREAM_HEARTBEAT = 15
+
 DJOSER = {
     "USER_ID_FIELD" : "username"
 }
\ No newline at end of file
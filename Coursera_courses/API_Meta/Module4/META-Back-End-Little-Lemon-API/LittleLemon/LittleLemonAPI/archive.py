@@ -0,0 +1,87 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from .models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
+
+# hot model -> its archive, with the same ids and columns
+ARCHIVES = {Order: ArchivedOrder, OrderItem: ArchivedOrderItem}
+
+
+def wants_history(request):
+    """True when the request asks for archived orders with ?history=true."""
+    return request.query_params.get("history", "").lower() in ("true", "1")
+
+
+def archive_cutoff(days=None):
+    """The first day that stays hot: orders placed before it are archived."""
+    if days is None:
+        days = getattr(settings, "LITTLELEMON_ARCHIVE_AFTER_DAYS", 365)
+    return timezone.localdate() - timedelta(days=days)
+
+
+def archivable_orders(before):
+    return Order.objects.filter(status=True, date__lt=before)
+
+
+def copy_to_archive(queryset):
+    """Copy the rows of `queryset` to its archive table with one INSERT ... SELECT."""
+    archive = ARCHIVES[queryset.model]
+    using = router.db_for_write(archive)
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    fields = archive._meta.concrete_fields
+    sql, params = (
+        queryset.order_by()
+        .values_list(*[field.attname for field in fields])
+        .query.get_compiler(using)
+        .as_sql()
+    )
+    columns = ", ".join(qn(field.column) for field in fields)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {qn(archive._meta.db_table)} ({columns}) {sql}", params
+        )
+
+
+def archive_batch(before, batch_size=1000):
+    """
+    Move up to batch_size delivered orders placed before the date `before`,
+    with their lines, to the archive tables in one transaction. Returns the
+    number of orders moved, 0 once there are none left.
+
+    Every batch commits on its own, so an interrupted run loses at most the
+    batch in flight and the next run carries on from there.
+    """
+    using = router.db_for_write(Order)
+    with transaction.atomic(using):
+        ids = list(
+            archivable_orders(before)
+            .using(using)
+            .select_for_update()
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return 0
+
+        orders = Order.objects.using(using).filter(id__in=ids)
+        copy_to_archive(orders)
+        copy_to_archive(OrderItem.objects.using(using).filter(order_id__in=ids))
+        # takes the lines along, and sends the post_delete signals that mark
+        # both tables as changed
+        orders.delete()
+    return len(ids)
+
+
+def archive_orders(before, batch_size=1000, max_batches=None):
+    """Archive batch after batch until none is left, yielding each batch's size."""
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        moved = archive_batch(before, batch_size)
+        if not moved:
+            return
+        batches += 1
+        yield moved
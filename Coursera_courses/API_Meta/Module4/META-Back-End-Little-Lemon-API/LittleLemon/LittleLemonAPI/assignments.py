@@ -0,0 +1,85 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from .caches import touch_table
+from .events import ORDER_CREW_ASSIGNED, order_event
+from .models import Order, OutboxEvent
+
+
+def assign_crews(assignments):
+    """
+    Apply validated (order_id, username[, version]) assignments in one
+    transaction and return a result per assignment, in the same order.
+
+    The users are resolved with one query and the orders locked and read
+    with another; the accepted assignments are written with one
+    bulk_update and their order.crew_assigned events with one bulk_create.
+    An assignment fails on its own (unknown order, unknown or non-crew
+    user, stale version, order listed twice) without holding back the rest.
+    """
+    usernames = {assignment["username"] for assignment in assignments}
+    # one query for the users, with whether each is a delivery crew
+    users = User.objects.filter(username__in=usernames).annotate(
+        is_crew=Exists(
+            User.groups.through.objects.filter(
+                user_id=OuterRef("pk"), group__name="Delivery Crew"
+            )
+        )
+    )
+    known_users = set()
+    crews = {}
+    for username, user_id, is_crew in users.values_list("username", "id", "is_crew"):
+        known_users.add(username)
+        if is_crew:
+            crews[username] = user_id
+
+    with transaction.atomic():
+        orders = Order.objects.select_for_update().in_bulk(
+            {assignment["order_id"] for assignment in assignments}
+        )
+        results = []
+        assigned = {}
+        events = []
+        for assignment in assignments:
+            order_id, username = assignment["order_id"], assignment["username"]
+            order = orders.get(order_id)
+            error = None
+            if order is None:
+                error = f"Order {order_id} does not exist"
+            elif order_id in assigned:
+                error = f"Order {order_id} is listed twice"
+            elif username not in known_users:
+                error = f"User {username} does not exist"
+            elif username not in crews:
+                error = f"{username} is not a delivery crew"
+            elif assignment.get("version", order.version) != order.version:
+                error = f"Order {order_id} was changed by another request"
+
+            if error is None:
+                previous_crew = order.delivery_crew_id
+                order.delivery_crew_id = crews[username]
+                order.version += 1
+                assigned[order_id] = order
+                events.append(
+                    order_event(
+                        ORDER_CREW_ASSIGNED, order, previous_delivery_crew=previous_crew
+                    )
+                )
+            results.append(
+                {
+                    "order_id": order_id,
+                    "username": username,
+                    "assigned": error is None,
+                    **({"error": error} if error else {"version": order.version}),
+                }
+            )
+
+        if assigned:
+            Order.objects.bulk_update(
+                assigned.values(), ["delivery_crew", "version"], batch_size=500
+            )
+            OutboxEvent.objects.bulk_create(events)
+            touch_table(Order)
+
+    return results
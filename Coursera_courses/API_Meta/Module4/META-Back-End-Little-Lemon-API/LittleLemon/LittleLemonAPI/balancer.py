@@ -0,0 +1,180 @@
+import heapq
+import time
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from .caches import touch_table
+from .events import (
+    ORDER_CREATED,
+    ORDER_CREW_ASSIGNED,
+    ORDER_DELETED,
+    ORDER_STATUS_CHANGED,
+    order_event,
+)
+from .models import Order, OutboxEvent
+
+
+class CrewLoads:
+    """
+    Open orders per delivery crew in a min-heap, so the least loaded crew
+    is found without a query. A changed load is pushed as a new entry
+    instead of updating the old one in place; entries that no longer match
+    `loads` are dropped when they reach the top. Ties go to the lowest id.
+    """
+
+    def __init__(self, loads):
+        # tells the crew_assigned events of this instance from the others
+        self.token = uuid.uuid4().hex
+        self.loads = dict(loads)
+        self.heap = [(load, crew) for crew, load in self.loads.items()]
+        heapq.heapify(self.heap)
+
+    def __len__(self):
+        return len(self.loads)
+
+    def add(self, crew, delta):
+        # crews that joined since the loads were read wait for the refresh
+        if crew not in self.loads:
+            return
+        self.loads[crew] = max(self.loads[crew] + delta, 0)
+        heapq.heappush(self.heap, (self.loads[crew], crew))
+        if len(self.heap) > 2 * len(self.loads) + 64:
+            self.heap = [(load, crew) for crew, load in self.loads.items()]
+            heapq.heapify(self.heap)
+
+    def pick(self):
+        """The least loaded crew, counted as one order busier. None without crews."""
+        while self.heap:
+            load, crew = self.heap[0]
+            if self.loads[crew] == load:
+                self.loads[crew] = load + 1
+                heapq.heapreplace(self.heap, (load + 1, crew))
+                return crew
+            heapq.heappop(self.heap)
+        return None
+
+    def apply(self, events):
+        """Follow the order events that open, move or close orders."""
+        for event in events:
+            payload = event.payload
+            crew = payload.get("delivery_crew")
+            if payload.get("balancer") == self.token:
+                # counted when it was picked
+                continue
+            if event.topic == ORDER_CREW_ASSIGNED and not payload.get("status"):
+                previous_crew = payload.get("previous_delivery_crew")
+                if previous_crew is not None:
+                    self.add(previous_crew, -1)
+                if crew is not None:
+                    self.add(crew, 1)
+            elif event.topic == ORDER_STATUS_CHANGED and crew is not None:
+                self.add(crew, -1 if payload.get("status") else 1)
+            elif event.topic in (ORDER_CREATED, ORDER_DELETED) and crew is not None:
+                if not payload.get("status"):
+                    self.add(crew, 1 if event.topic == ORDER_CREATED else -1)
+
+
+def crew_loads():
+    """{crew id: open orders} of every active delivery crew, in one query."""
+    return dict(
+        User.objects.filter(groups__name="Delivery Crew", is_active=True)
+        .annotate(
+            open_orders=Count("delivery_crew", filter=Q(delivery_crew__status=False))
+        )
+        .values_list("id", "open_orders")
+    )
+
+
+_loads = None
+_loaded_at = None
+
+
+def get_crew_loads():
+    """
+    The CrewLoads of this process, read again from the database every
+    LITTLELEMON_CREW_LOAD_REFRESH seconds. In between they follow the
+    order events, and the refresh corrects any drift: events handled by
+    other workers, delivered twice, or picks whose batch was rolled back.
+    """
+    global _loads, _loaded_at
+    refresh = getattr(settings, "LITTLELEMON_CREW_LOAD_REFRESH", 60)
+    if _loads is None or time.monotonic() - _loaded_at > refresh:
+        _loads = CrewLoads(crew_loads())
+        _loaded_at = time.monotonic()
+    return _loads
+
+
+def reset_crew_loads():
+    global _loads
+    _loads = None
+
+
+def assign_orders(orders, loads=None):
+    """
+    Give every unassigned open order of `orders` to the least loaded crew
+    and record their order.crew_assigned events, all in one transaction.
+    Returns the number of orders assigned.
+    """
+    if loads is None:
+        loads = get_crew_loads()
+    try:
+        with transaction.atomic():
+            orders = list(
+                orders.filter(delivery_crew__isnull=True, status=False)
+                .select_for_update()
+                .only("id", "user_id", "status", "date")
+                .order_by("id")
+            )
+            assigned = []
+            crew_orders = defaultdict(list)
+            for order in orders:
+                crew = loads.pick()
+                if crew is None:
+                    break
+                order.delivery_crew_id = crew
+                assigned.append(order)
+                crew_orders[crew].append(order.id)
+
+            if assigned:
+                # an UPDATE per crew: there are far fewer crews than orders,
+                # and it skips the CASE WHEN per row a bulk_update builds
+                for crew, ids in crew_orders.items():
+                    Order.objects.filter(id__in=ids).update(
+                        delivery_crew_id=crew, version=F("version") + 1
+                    )
+                OutboxEvent.objects.bulk_create(
+                    order_event(
+                        ORDER_CREW_ASSIGNED,
+                        order,
+                        previous_delivery_crew=None,
+                        balancer=loads.token,
+                    )
+                    for order in assigned
+                )
+                touch_table(Order)
+    except Exception:
+        # the picks counted orders that were not assigned after all
+        reset_crew_loads()
+        raise
+    return len(assigned)
+
+
+def balance_orders(events):
+    """
+    Outbox handler: keep the crew loads current and assign every new order
+    that has no delivery crew yet.
+    """
+    loads = get_crew_loads()
+    loads.apply(events)
+    new_orders = [
+        event.order_id
+        for event in events
+        if event.topic == ORDER_CREATED and event.payload.get("delivery_crew") is None
+    ]
+    if new_orders:
+        assign_orders(Order.objects.filter(id__in=new_orders), loads)
@@ -0,0 +1,130 @@
+from contextlib import contextmanager
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User, Group
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from rest_framework.authtoken.models import Token
+
+from .models import Category, MenuItem, Order, OrderItem
+from .search import rebuild_search_index
+
+
+@contextmanager
+def throwaway_database(verbosity=0):
+    """
+    Run the block against a freshly migrated test database, the way the
+    test runner does, and destroy it afterwards.
+    """
+    old_name = connection.creation.create_test_db(
+        verbosity=verbosity, autoclobber=True, serialize=False
+    )
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+
+
+@contextmanager
+def database_profile(**overrides):
+    """
+    Run the block with the default database settings updated by
+    `overrides` (NAME, CONN_MAX_AGE, OPTIONS, ...). Connections opened by
+    any thread in the block use them.
+    """
+    original = connections.settings[DEFAULT_DB_ALIAS]
+    reset_default_connection()
+    connections.settings[DEFAULT_DB_ALIAS] = {**original, **overrides}
+    try:
+        yield
+    finally:
+        reset_default_connection()
+        connections.settings[DEFAULT_DB_ALIAS] = original
+
+
+def reset_default_connection():
+    connection.close()
+    if hasattr(connection, "close_pool"):
+        connection.close_pool()
+    try:
+        del connections[DEFAULT_DB_ALIAS]
+    except AttributeError:
+        pass
+
+
+def seed_menu(items, categories=10):
+    categories = Category.objects.bulk_create(
+        Category(slug=f"category-{i}", title=f"Category {i}") for i in range(categories)
+    )
+    menuitems = MenuItem.objects.bulk_create(
+        MenuItem(
+            title=f"Menu item {i}",
+            price=Decimal("2.50") + i % 40,
+            featured=i % 7 == 0,
+            category=categories[i % len(categories)],
+        )
+        for i in range(items)
+    )
+    # bulk_create sends no signals
+    rebuild_search_index()
+    return menuitems
+
+
+def seed_orders(orders, users, crews=(), menuitems=(), batch_size=5000):
+    """
+    Create `orders` orders spread over a year, with 1-3 lines each when
+    menu items are given. Returns the order ids.
+    """
+    start = date(2023, 1, 1)
+    ids = []
+    for first in range(0, orders, batch_size):
+        batch = Order.objects.bulk_create(
+            Order(
+                user=users[i % len(users)],
+                delivery_crew=crews[i % len(crews)] if crews and i % 3 else None,
+                status=i % 5 == 0,
+                total=Decimal("12.75") + i % 20,
+            )
+            for i in range(first, min(first + batch_size, orders))
+        )
+        # date is auto_now_add, so it is set per batch afterwards
+        Order.objects.filter(id__in=[order.id for order in batch]).update(
+            date=start + timedelta(days=first // batch_size % 365)
+        )
+        if menuitems:
+            OrderItem.objects.bulk_create(
+                OrderItem(
+                    order=order,
+                    menuitem=menuitem,
+                    quantity=1 + order.id % 4,
+                    unit_price=menuitem.price,
+                    line_total=menuitem.price * (1 + order.id % 4),
+                )
+                for order in batch
+                for menuitem in [
+                    menuitems[(order.id * 7 + line) % len(menuitems)]
+                    for line in range(1 + order.id % 3)
+                ]
+            )
+        ids += [order.id for order in batch]
+    return ids
+
+
+def seed_users(prefix, count, group=None):
+    """Create users without a usable password, optionally in a group."""
+    users = User.objects.bulk_create(
+        User(username=f"{prefix}{i}", password=make_password(None))
+        for i in range(count)
+    )
+    if group is not None:
+        Group.objects.get_or_create(name=group)[0].user_set.add(*users)
+    return users
+
+
+def issue_tokens(users):
+    """Return {user id: auth token key}."""
+    tokens = Token.objects.bulk_create(
+        Token(user=user, key=Token.generate_key()) for user in users
+    )
+    return {token.user_id: token.key for token in tokens}
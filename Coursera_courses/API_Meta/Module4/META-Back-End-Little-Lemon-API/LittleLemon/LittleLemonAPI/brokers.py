@@ -0,0 +1,136 @@
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+try:
+    import redis.asyncio as redis
+except ImportError:
+    redis = None
+
+# what a subscription returns after it had to drop messages
+RESYNC = {"topic": "resync"}
+
+
+class QueueSubscription:
+    def __init__(self, broker, channel, maxsize):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def put(self, message):
+        # publishers may run on another thread's event loop
+        self.loop.call_soon_threadsafe(self.put_nowait, message)
+
+    def put_nowait(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout):
+        """The next message, None after `timeout` seconds without one."""
+        if self.overflowed:
+            # the reader fell behind: drop the backlog, have it start over
+            self.overflowed = False
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            return RESYNC
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InMemoryBroker:
+    """
+    Publish/subscribe between the coroutines and threads of one process.
+    It only reaches subscribers in the publisher's process, so it serves
+    the tests and single-process setups; use RedisBroker across processes.
+    """
+
+    def __init__(self, maxsize=100, **options):
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        self.subscriptions = defaultdict(set)
+
+    async def publish(self, channel, message):
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.put(message)
+
+    async def subscribe(self, channel):
+        """A subscription to `channel`, close() it when done."""
+        subscription = QueueSubscription(self, channel, self.maxsize)
+        with self.lock:
+            self.subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.channel, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self.subscriptions.pop(subscription.channel, None)
+
+
+class RedisSubscription:
+    def __init__(self, pubsub):
+        self.pubsub = pubsub
+
+    async def get(self, timeout):
+        message = await self.pubsub.get_message(
+            ignore_subscribe_messages=True, timeout=timeout
+        )
+        return json.loads(message["data"]) if message is not None else None
+
+    async def close(self):
+        await self.pubsub.unsubscribe()
+        await self.pubsub.aclose()
+
+
+class RedisBroker:
+    """Redis pub/sub, shared by every process using the same server."""
+
+    def __init__(self, location, key_prefix="littlelemon:", **options):
+        if redis is None:
+            raise ImportError("RedisBroker needs the redis package")
+        self.client = redis.Redis.from_url(location)
+        self.key_prefix = key_prefix
+
+    async def publish(self, channel, message):
+        await self.client.publish(self.key_prefix + channel, json.dumps(message))
+
+    async def subscribe(self, channel):
+        pubsub = self.client.pubsub()
+        await pubsub.subscribe(self.key_prefix + channel)
+        return RedisSubscription(pubsub)
+
+
+_broker = None
+
+
+def get_broker():
+    """The LITTLELEMON_BROKER of this process."""
+    global _broker
+    if _broker is None:
+        options = dict(
+            getattr(
+                settings,
+                "LITTLELEMON_BROKER",
+                {"BACKEND": "LittleLemonAPI.brokers.InMemoryBroker"},
+            )
+        )
+        _broker = import_string(options.pop("BACKEND"))(
+            **{key.lower(): value for key, value in options.items()}
+        )
+    return _broker
@@ -0,0 +1,103 @@
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+
+VERSION_KEY = "littlelemon:version:{}"
+MODIFIED_KEY = "littlelemon:modified:{}"
+
+
+def get_catalog_cache():
+    return caches[getattr(settings, "LITTLELEMON_CATALOG_CACHE", "default")]
+
+
+def catalog_cache_is_shared():
+    """
+    Whether every process serving the API sees the same catalog cache.
+
+    The table versions live in it, so the cached responses and the ETags
+    built on them can only be trusted when a write in one process bumps the
+    versions every other process reads. LITTLELEMON_SHARED_CACHE decides;
+    without it, only a cache that isn't private to the process counts.
+    """
+    shared = getattr(settings, "LITTLELEMON_SHARED_CACHE", None)
+    if shared is None:
+        shared = not isinstance(get_catalog_cache(), LocMemCache)
+    return shared
+
+
+def table_version(model):
+    """
+    Return the change counter of a model's table.
+
+    A missing counter (first use, eviction, cache restart) starts from the
+    current time in nanoseconds, so it never goes back to a value that older
+    cache entries were stored under.
+    """
+    cache = get_catalog_cache()
+    key = VERSION_KEY.format(model._meta.label_lower)
+    version = cache.get(key)
+
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+
+    return version
+
+
+def table_last_modified(model):
+    """Return the time of the last change to a model's table as a timestamp."""
+    cache = get_catalog_cache()
+    key = MODIFIED_KEY.format(model._meta.label_lower)
+    modified = cache.get(key)
+
+    if modified is None:
+        # unknown, so assume it just changed
+        cache.add(key, time.time(), timeout=None)
+        modified = cache.get(key)
+
+    return modified
+
+
+def bump_table_version(model):
+    cache = get_catalog_cache()
+    key = VERSION_KEY.format(model._meta.label_lower)
+
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+    cache.set(MODIFIED_KEY.format(model._meta.label_lower), time.time(), timeout=None)
+
+
+def touch_table(model):
+    """
+    Mark a model's table as changed. Use it after writes that send no
+    signals (bulk_create, QuerySet.update).
+    """
+    bump_table_version(model)
+    # once more after commit, so nothing cached from the old rows between
+    # the write and the commit survives
+    transaction.on_commit(lambda: bump_table_version(model))
+
+
+def normalize_query(query_params, allowed):
+    """Keep only the parameters that change the output, in a stable order."""
+    return urlencode(
+        [
+            (name, value)
+            for name in sorted(set(query_params) & set(allowed))
+            for value in query_params.getlist(name)
+        ]
+    )
+
+
+def catalog_cache_key(request, prefix, models, allowed_params):
+    versions = "-".join(str(table_version(model)) for model in models)
+    query = normalize_query(request.query_params, allowed_params)
+    return f"littlelemon:catalog:{prefix}:{versions}:{request.get_host()}:{query}"
@@ -0,0 +1,37 @@
+from django.db import transaction
+
+from .models import Cart
+from .caches import touch_table
+
+
+def update_cart(user, lines):
+    """
+    Apply validated cart lines for a user in one transaction.
+
+    Lines with a quantity are inserted or have their quantity replaced by a
+    single INSERT ... ON CONFLICT DO UPDATE, lines with quantity 0 are
+    removed with a single DELETE. Returns the (updated, removed) menu item ids.
+    """
+    updated = [line for line in lines if line["quantity"] > 0]
+    removed = [line["menuitem_id"] for line in lines if line["quantity"] == 0]
+
+    with transaction.atomic():
+        if updated:
+            Cart.objects.bulk_create(
+                [
+                    Cart(
+                        user=user,
+                        menuitem_id=line["menuitem_id"],
+                        quantity=line["quantity"],
+                    )
+                    for line in updated
+                ],
+                update_conflicts=True,
+                unique_fields=["menuitem", "user"],
+                update_fields=["quantity"],
+            )
+            touch_table(Cart)
+        if removed:
+            Cart.objects.filter(user=user, menuitem_id__in=removed).delete()
+
+    return [line["menuitem_id"] for line in updated], removed
@@ -0,0 +1,55 @@
+from django.db import transaction
+from django.db.models import DecimalField, F, Sum
+
+from .models import Cart, Order, OrderItem
+from .caches import touch_table
+from .events import publish, ORDER_CREATED
+
+
+def place_order(user):
+    """
+    Turn the user's cart into an order in one transaction.
+
+    The cart lines are locked and read once together with the menu prices,
+    the total is summed as a Decimal by the database and every OrderItem is
+    inserted with one bulk_create, with the price it was sold at. Returns
+    None when the cart is empty.
+    """
+    cart = Cart.objects.filter(user=user)
+
+    with transaction.atomic():
+        # lock the cart rows so two concurrent checkouts can't both consume them
+        lines = list(
+            cart.select_for_update(of=("self",)).values_list(
+                "menuitem_id", "quantity", "menuitem__price"
+            )
+        )
+
+        if not lines:
+            return None
+
+        total = cart.aggregate(
+            total=Sum(
+                F("menuitem__price") * F("quantity"),
+                output_field=DecimalField(max_digits=6, decimal_places=2),
+            )
+        )["total"]
+
+        order = Order.objects.create(user=user, status=False, total=total)
+        OrderItem.objects.bulk_create(
+            [
+                OrderItem(
+                    order=order,
+                    menuitem_id=menuitem_id,
+                    quantity=quantity,
+                    unit_price=price,
+                    line_total=price * quantity,
+                )
+                for menuitem_id, quantity, price in lines
+            ]
+        )
+        touch_table(OrderItem)
+        cart.delete()
+        publish(ORDER_CREATED, order)
+
+    return order
@@ -0,0 +1,109 @@
+from django.db import connections, router, transaction
+from django.db.models import BooleanField, ExpressionWrapper, F, Q
+from django.db.models.sql import UpdateQuery
+from django.utils.cache import parse_etags
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = "The resource was changed by another request."
+    default_code = "precondition_failed"
+
+
+def if_match_versions(request):
+    """
+    The versions listed in If-Match, None when any version goes (no header,
+    or *). Weak tags (W/"3") are left out: If-Match calls for the strong
+    comparison, which a weak tag never passes.
+    """
+    header = request.headers.get("If-Match")
+    if header is None:
+        return None
+    tags = parse_etags(header)
+    if tags == ["*"]:
+        return None
+    versions = []
+    for tag in tags:
+        if tag.startswith("W/"):
+            continue
+        tag = tag.strip('"')
+        if tag.isdigit():
+            versions.append(int(tag))
+    return versions
+
+
+def can_update_returning(connection):
+    # SQLite has RETURNING since 3.35, when it can return inserted columns
+    return connection.vendor == "postgresql" or (
+        connection.vendor == "sqlite"
+        and connection.features.can_return_columns_from_insert
+    )
+
+
+def versioned_update(model, pk, versions=None, returning=(), **values):
+    """
+    Set `values` on row pk and bump its version in one UPDATE, provided the
+    row still has one of `versions` (any version when None). Returns an
+    instance with the version and the `returning` fields loaded.
+
+    On PostgreSQL and SQLite the statement is UPDATE ... RETURNING, a
+    single round trip with no SELECT before or after; other databases read
+    the row back in the same transaction. Raises NotFound when there is no
+    row pk and PreconditionFailed when it has another version.
+    """
+    using = router.db_for_write(model)
+    queryset = model.objects.using(using).filter(pk=pk)
+    if versions is not None:
+        queryset = queryset.filter(version__in=versions)
+    values["version"] = F("version") + 1
+    fields = [model._meta.pk.attname, "version", *returning]
+
+    connection = connections[using]
+    if versions == []:
+        # If-Match without a version this API hands out
+        rows = []
+    elif can_update_returning(connection):
+        query = queryset.query.chain(UpdateQuery)
+        query.add_update_values(values)
+        sql, params = query.get_compiler(using).as_sql()
+        qn = connection.ops.quote_name
+        columns = ", ".join(qn(model._meta.get_field(field).column) for field in fields)
+        # a raw queryset converts the returned columns like a SELECT would
+        rows = list(
+            model.objects.db_manager(using).raw(f"{sql} RETURNING {columns}", params)
+        )
+    else:
+        with transaction.atomic(using):
+            rows = []
+            if queryset.update(**values):
+                rows = list(model.objects.using(using).filter(pk=pk).only(*fields))
+
+    if rows:
+        return rows[0]
+    if versions is not None and model.objects.using(using).filter(pk=pk).exists():
+        raise PreconditionFailed()
+    raise NotFound()
+
+
+def toggle(model, pk, field, versions=None, returning=()):
+    """Flip the boolean `field` of row pk, see versioned_update()."""
+    return versioned_update(
+        model,
+        pk,
+        versions,
+        returning=[field, *returning],
+        **{field: ExpressionWrapper(~Q(**{field: True}), output_field=BooleanField())},
+    )
+
+
+def claim_version(instance, versions=None):
+    """
+    Bump the stored version of `instance` before writing it in the same
+    transaction, checking it against `versions`. A concurrent writer that
+    read the same version then fails with PreconditionFailed instead of
+    overwriting this write, and no row is locked longer than the write.
+    """
+    instance.version = versioned_update(type(instance), instance.pk, versions).version
+    return instance.version
@@ -0,0 +1,126 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.exceptions import NotAuthenticated, PermissionDenied
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .brokers import RESYNC, get_broker
+from .models import Order
+from .permissions import get_user_roles
+
+# managers see the changes of every order
+MANAGERS_CHANNEL = "orders"
+
+
+def crew_channel(user_id):
+    return f"orders:crew:{user_id}"
+
+
+def event_message(event):
+    return {
+        "id": event.id,
+        "topic": event.topic,
+        "order": event.order_id,
+        **event.payload,
+    }
+
+
+def event_channels(event):
+    channels = [MANAGERS_CHANNEL]
+    # the crew an order was taken from hears about it too
+    for key in ("delivery_crew", "previous_delivery_crew"):
+        crew = event.payload.get(key)
+        if crew is not None and crew_channel(crew) not in channels:
+            channels.append(crew_channel(crew))
+    return channels
+
+
+async def push_order_events(events):
+    """
+    Outbox handler: publish order events to the streams of the managers
+    and of the delivery crews involved. Delivery is at least once, so
+    clients skip event ids they have already seen.
+    """
+    broker = get_broker()
+    for event in events:
+        message = event_message(event)
+        for channel in event_channels(event):
+            await broker.publish(channel, message)
+
+
+def stream_subscriber(request):
+    """
+    Authenticate a plain Django request the way the API views do and
+    return (user, channel of their stream). Raises the DRF exceptions for
+    401 and 403: only managers and delivery crews have a stream.
+    """
+    request = Request(
+        request,
+        authenticators=[
+            authenticator()
+            for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+        ],
+    )
+    user = request.user
+    if not user.is_authenticated:
+        raise NotAuthenticated()
+    roles = get_user_roles(request)
+    if "Manager" in roles or user.is_superuser:
+        return user, MANAGERS_CHANNEL
+    if "Delivery Crew" in roles:
+        return user, crew_channel(user.pk)
+    raise PermissionDenied()
+
+
+def open_orders(user):
+    return list(
+        Order.objects.filter(delivery_crew=user, status=False)
+        .order_by("id")
+        .values("id", "user_id", "status", "total", "date")
+    )
+
+
+def server_sent_event(data, event=None, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, cls=DjangoJSONEncoder)}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def order_stream(user, channel):
+    """
+    Server-sent events for one client: a snapshot of the crew's open orders,
+    then every order event on `channel`, with a keepalive comment when
+    nothing happened for a while. A client that fell behind gets a fresh
+    snapshot (empty for managers) in place of the events it missed.
+    """
+    heartbeat = getattr(settings, "LITTLELEMON_STREAM_HEARTBEAT", 15)
+    snapshot = channel != MANAGERS_CHANNEL
+    # subscribed before the snapshot is read, so no change falls in between
+    subscription = await get_broker().subscribe(channel)
+    try:
+        if snapshot:
+            orders = await sync_to_async(open_orders)(user)
+            yield server_sent_event(orders, event="snapshot")
+        else:
+            yield ": connected\n\n"
+
+        while True:
+            message = await subscription.get(heartbeat)
+            if message is None:
+                yield ": keepalive\n\n"
+            elif message == RESYNC:
+                orders = await sync_to_async(open_orders)(user) if snapshot else []
+                yield server_sent_event(orders, event="snapshot")
+            else:
+                yield server_sent_event(
+                    message, event=message["topic"], event_id=message["id"]
+                )
+    finally:
+        await subscription.close()
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Min
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+ORDER_CREATED = "order.created"
+ORDER_CREW_ASSIGNED = "order.crew_assigned"
+ORDER_STATUS_CHANGED = "order.status_changed"
+ORDER_DELETED = "order.deleted"
+
+
+def order_payload(order, **extra):
+    return {
+        "user": order.user_id,
+        "delivery_crew": order.delivery_crew_id,
+        "status": order.status,
+        "date": str(order.date),
+        **extra,
+    }
+
+
+def order_event(topic, order, **extra):
+    """An unsaved outbox event, for OutboxEvent.objects.bulk_create()."""
+    return OutboxEvent(
+        topic=topic, order_id=order.pk, payload=order_payload(order, **extra)
+    )
+
+
+def publish(topic, order, **extra):
+    """
+    Record an order event in the outbox.
+
+    Call it inside the transaction that changes the order, so the event is
+    stored if and only if the change is.
+    """
+    event = order_event(topic, order, **extra)
+    event.save()
+    return event
+
+
+def get_handlers():
+    """
+    Import the LITTLELEMON_EVENT_HANDLERS. Each one is a function (or
+    coroutine function) called with a list of OutboxEvents.
+    """
+    return [
+        import_string(path)
+        for path in getattr(settings, "LITTLELEMON_EVENT_HANDLERS", [])
+    ]
+
+
+def dispatch(events):
+    for handler in get_handlers():
+        if asyncio.iscoroutinefunction(handler):
+            async_to_sync(handler)(events)
+        else:
+            handler(events)
+
+
+def deliver(events):
+    """Hand events to every handler and mark them processed, all or nothing."""
+    with transaction.atomic():
+        # skip_locked lets several workers drain the outbox side by side
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True)
+            .filter(id__in=[event.id for event in events], processed__isnull=True)
+            .order_by("id")
+        )
+        if events:
+            dispatch(events)
+            OutboxEvent.objects.filter(id__in=[event.id for event in events]).update(
+                processed=timezone.now()
+            )
+    return events
+
+
+def process_batch(batch_size=100, max_attempts=10):
+    """
+    Deliver the oldest pending events. Returns (delivered, failed).
+
+    Delivery is at least once: an event stays pending until every handler
+    has run for it without raising. When a batch fails its events are
+    retried one by one, so a single bad event doesn't hold the others back.
+    """
+    events = list(
+        OutboxEvent.objects.filter(
+            processed__isnull=True, attempts__lt=max_attempts
+        ).order_by("id")[:batch_size]
+    )
+    if not events:
+        return 0, 0
+
+    try:
+        return len(deliver(events)), 0
+    except Exception:
+        logger.exception(
+            "Outbox batch of %d events failed, retrying one by one", len(events)
+        )
+
+    delivered = failed = 0
+    for event in events:
+        try:
+            delivered += len(deliver([event]))
+        except Exception as error:
+            failed += 1
+            logger.exception("Outbox event %d (%s) failed", event.id, event.topic)
+            OutboxEvent.objects.filter(id=event.id).update(
+                attempts=F("attempts") + 1, last_error=repr(error)
+            )
+    return delivered, failed
+
+
+def outbox_lag(max_attempts=10):
+    """
+    Age of the oldest event still to be delivered, None when there is none.
+    Dead events are left out, as process_batch() no longer retries them.
+    """
+    oldest = OutboxEvent.objects.filter(
+        processed__isnull=True, attempts__lt=max_attempts
+    ).aggregate(oldest=Min("created"))["oldest"]
+    return timezone.now() - oldest if oldest is not None else None
+
+
+def dead_events(max_attempts=10):
+    """The number of pending events that failed max_attempts times."""
+    return OutboxEvent.objects.filter(
+        processed__isnull=True, attempts__gte=max_attempts
+    ).count()
+
+
+def purge_processed(days):
+    cutoff = timezone.now() - timedelta(days=days)
+    return OutboxEvent.objects.filter(processed__lt=cutoff).delete()[0]
@@ -0,0 +1,40 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from LittleLemonAPI.archive import archive_cutoff, archive_orders
+
+
+class Command(BaseCommand):
+    help = (
+        "Move delivered orders older than LITTLELEMON_ARCHIVE_AFTER_DAYS (or "
+        "--days, or placed before --before) and their lines to the archive "
+        "tables, one transaction per batch. Stop it at any time: the next "
+        "run carries on where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int)
+        parser.add_argument("--before", type=date.fromisoformat)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--max-batches",
+            type=int,
+            help="Stop after this many batches, to spread the work over runs.",
+        )
+
+    def handle(self, *args, days, before, batch_size, max_batches, **options):
+        if before is None:
+            before = archive_cutoff(days)
+
+        archived = 0
+        for moved in archive_orders(before, batch_size, max_batches):
+            archived += moved
+            if options["verbosity"] > 1:
+                self.stdout.write(f"Archived {archived} order(s)")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Archived {archived} delivered order(s) placed before {before}"
+            )
+        )
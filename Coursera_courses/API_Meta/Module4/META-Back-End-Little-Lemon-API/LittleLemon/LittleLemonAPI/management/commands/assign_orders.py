@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from LittleLemonAPI.balancer import assign_orders, crew_loads, CrewLoads
+from LittleLemonAPI.models import Order
+
+
+class Command(BaseCommand):
+    help = (
+        "Give every open order without a delivery crew to the least loaded "
+        "crew, --batch-size orders per transaction. New orders are assigned "
+        "by the process_outbox worker; this catches up on older ones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, batch_size, **options):
+        loads = CrewLoads(crew_loads())
+        if not len(loads):
+            self.stdout.write("There are no delivery crews to assign orders to")
+            return
+
+        unassigned = Order.objects.filter(delivery_crew__isnull=True, status=False)
+        assigned = 0
+        last_id = 0
+        while True:
+            ids = list(
+                unassigned.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            assigned += assign_orders(Order.objects.filter(id__in=ids), loads)
+            last_id = ids[-1]
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Assigned {assigned} order(s) to {len(loads)} crew(s)")
+        )
@@ -0,0 +1,124 @@
+import random
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from LittleLemonAPI.balancer import balance_orders, crew_loads, reset_crew_loads
+from LittleLemonAPI.benchmarks import throwaway_database, seed_users
+from LittleLemonAPI.events import (
+    ORDER_CREATED,
+    ORDER_CREW_ASSIGNED,
+    ORDER_STATUS_CHANGED,
+    order_event,
+)
+from LittleLemonAPI.models import Order, OutboxEvent
+
+
+def assign_by_count(events):
+    """The baseline: one COUNT query per order to find the least loaded crew."""
+    new_orders = [event.order_id for event in events if event.topic == ORDER_CREATED]
+    with transaction.atomic():
+        for order in Order.objects.filter(id__in=new_orders).order_by("id"):
+            crew = (
+                User.objects.filter(groups__name="Delivery Crew", is_active=True)
+                .annotate(
+                    open_orders=Count(
+                        "delivery_crew", filter=Q(delivery_crew__status=False)
+                    )
+                )
+                .order_by("open_orders", "id")
+                .values_list("id", flat=True)
+                .first()
+            )
+            Order.objects.filter(id=order.id).update(
+                delivery_crew_id=crew, version=F("version") + 1
+            )
+            order.delivery_crew_id = crew
+            OutboxEvent.objects.create(
+                topic=ORDER_CREW_ASSIGNED,
+                order_id=order.id,
+                payload=order_event(ORDER_CREW_ASSIGNED, order).payload,
+            )
+
+
+STRATEGIES = {"count": assign_by_count, "heap": balance_orders}
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate rounds of new orders and deliveries on a throwaway database "
+        "and time assigning the new orders, with the balancer's heap of crew "
+        "loads and with a COUNT query per order."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--crews", type=int, default=50)
+        parser.add_argument("--rounds", type=int, default=20)
+        parser.add_argument(
+            "--orders", type=int, default=500, help="New orders per round."
+        )
+        parser.add_argument(
+            "--deliver",
+            type=float,
+            default=0.5,
+            help="Share of the open orders delivered before each round.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, crews, **options):
+        self.stdout.write(
+            f"{'strategy':<10} {'assigned':>9} {'ms':>9} {'orders/min':>12} "
+            f"{'spread':>7}"
+        )
+        with throwaway_database():
+            customers = seed_users("customer", 50)
+            seed_users("crew", crews, group="Delivery Crew")
+            for name, assign in STRATEGIES.items():
+                assigned, elapsed, spread = self.simulate(assign, customers, **options)
+                self.stdout.write(
+                    f"{name:<10} {assigned:>9} {elapsed * 1000:>9.1f} "
+                    f"{assigned / elapsed * 60:>12.0f} {spread:>7}"
+                )
+                OutboxEvent.objects.all().delete()
+                Order.objects.all().delete()
+
+    def simulate(self, assign, customers, rounds, orders, deliver, seed, **options):
+        """
+        Returns (orders assigned, seconds spent assigning, difference between
+        the most and the least open orders of a crew at the end).
+        """
+        rng = random.Random(seed)
+        reset_crew_loads()
+        elapsed = 0
+        for _ in range(rounds):
+            open_orders = list(
+                Order.objects.filter(
+                    status=False, delivery_crew__isnull=False
+                ).values_list("id", flat=True)
+            )
+            delivered = rng.sample(open_orders, int(len(open_orders) * deliver))
+            Order.objects.filter(id__in=delivered).update(status=True)
+            events = OutboxEvent.objects.bulk_create(
+                order_event(ORDER_STATUS_CHANGED, order)
+                for order in Order.objects.filter(id__in=delivered)
+            )
+
+            new_orders = Order.objects.bulk_create(
+                Order(user=rng.choice(customers), total=Decimal("12.75"))
+                for _ in range(orders)
+            )
+            events += OutboxEvent.objects.bulk_create(
+                order_event(ORDER_CREATED, order) for order in new_orders
+            )
+
+            started = time.perf_counter()
+            assign(events)
+            elapsed += time.perf_counter() - started
+
+        assigned = Order.objects.filter(delivery_crew__isnull=False).count()
+        loads = crew_loads().values()
+        return assigned, elapsed, max(loads) - min(loads)
@@ -0,0 +1,154 @@
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, close_old_connections, connection, connections
+
+from LittleLemonAPI.benchmarks import (
+    throwaway_database,
+    database_profile,
+    seed_menu,
+    seed_users,
+)
+from LittleLemonAPI.carts import update_cart
+from LittleLemonAPI.checkout import place_order
+from LittleLemonAPI.management.commands.loadtest import percentile
+from LittleLemonAPI.models import Order
+
+SQLITE_PROFILES = {
+    # Django's defaults: a connection per request, rollback journal
+    "sqlite": {"CONN_MAX_AGE": 0, "OPTIONS": {}},
+    # the production profile
+    "sqlite-tuned": {
+        "CONN_MAX_AGE": 60,
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": settings.LITTLELEMON_SQLITE_OPTIONS,
+    },
+}
+
+POSTGRES_PROFILES = {
+    "postgres": {"CONN_MAX_AGE": 0, "OPTIONS": {}},
+    "postgres-persistent": {
+        "CONN_MAX_AGE": 60,
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {},
+    },
+    "postgres-pool": {
+        "CONN_MAX_AGE": 0,
+        "OPTIONS": {"pool": {"min_size": 2, "max_size": 20}},
+    },
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare checkout throughput of the database profiles with concurrent "
+        "customers. SQLite profiles run on temporary files, the Postgres ones "
+        "on a test database of the configured server (LITTLELEMON_DB=postgres)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--profiles",
+            nargs="+",
+            choices=[*SQLITE_PROFILES, *POSTGRES_PROFILES],
+        )
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument(
+            "--checkouts", type=int, default=50, help="Checkouts per customer."
+        )
+        parser.add_argument("--lines", type=int, default=3)
+
+    def handle(self, *args, profiles, **options):
+        postgres = connection.vendor == "postgresql"
+        if profiles is None:
+            profiles = [*SQLITE_PROFILES, *(POSTGRES_PROFILES if postgres else [])]
+        if not postgres and set(profiles) & set(POSTGRES_PROFILES):
+            raise CommandError("Set LITTLELEMON_DB=postgres for the Postgres profiles")
+
+        self.stdout.write(
+            f"{'profile':<20} {'orders':>7} {'errors':>7} {'orders/s':>9} "
+            f"{'p50 ms':>8} {'p95 ms':>8}"
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            for name in profiles:
+                if name in SQLITE_PROFILES:
+                    with database_profile(
+                        ENGINE="django.db.backends.sqlite3",
+                        NAME=str(Path(directory) / f"{name}.sqlite3"),
+                        **SQLITE_PROFILES[name],
+                    ):
+                        call_command("migrate", verbosity=0)
+                        self.report(name, self.run(name, **options))
+
+        postgres_profiles = [name for name in profiles if name in POSTGRES_PROFILES]
+        if postgres_profiles:
+            with throwaway_database():
+                for name in postgres_profiles:
+                    with database_profile(**POSTGRES_PROFILES[name]):
+                        self.report(name, self.run(name, **options))
+
+    def run(self, name, concurrency, checkouts, lines, **options):
+        menuitem_ids = [menuitem.id for menuitem in seed_menu(50, categories=5)]
+        customers = seed_users(f"{name}-customer", concurrency)
+        connections.close_all()
+
+        latencies, errors = [], []
+        lock = threading.Lock()
+
+        def customer(user, rng):
+            try:
+                for _ in range(checkouts):
+                    cart = [
+                        {"menuitem_id": menuitem_id, "quantity": rng.randint(1, 3)}
+                        for menuitem_id in rng.sample(menuitem_ids, lines)
+                    ]
+                    # the connection handling of one request
+                    close_old_connections()
+                    started = time.perf_counter()
+                    try:
+                        update_cart(user, cart)
+                        place_order(user)
+                    except DatabaseError as error:
+                        with lock:
+                            errors.append(error)
+                    else:
+                        with lock:
+                            latencies.append(time.perf_counter() - started)
+                    finally:
+                        close_old_connections()
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=customer, args=(user, random.Random(i)))
+            for i, user in enumerate(customers)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        orders = Order.objects.filter(user__in=customers).count()
+        return orders, errors, sorted(latencies), elapsed
+
+    def report(self, name, result):
+        orders, errors, latencies, elapsed = result
+        if latencies:
+            p50 = f"{percentile(latencies, 50) * 1000:>8.1f}"
+            p95 = f"{percentile(latencies, 95) * 1000:>8.1f}"
+        else:
+            p50 = p95 = f"{'-':>8}"
+        self.stdout.write(
+            f"{name:<20} {orders:>7} {len(errors):>7} {orders / elapsed:>9.1f} "
+            f"{p50} {p95}"
+        )
+        if errors:
+            self.stdout.write(f"  first error: {errors[0]}")
@@ -0,0 +1,101 @@
+import timeit
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from LittleLemonAPI import renderers
+from LittleLemonAPI.models import Category, MenuItem, Order, OrderItem
+from LittleLemonAPI.renderers import FastJSONRenderer
+from LittleLemonAPI.serializers import MenuItemSerializer, OrderItemSerializer
+
+CATEGORY = Category(id=1, slug="mains", title="Main Courses")
+
+
+def menu_payload(rows):
+    items = [
+        MenuItem(
+            id=i,
+            title=f"Menu item {i}",
+            price=Decimal("12.50") + i % 40,
+            featured=i % 7 == 0,
+            category=CATEGORY,
+        )
+        for i in range(1, rows + 1)
+    ]
+    return MenuItemSerializer(items, many=True).data
+
+
+def order_item_payload(rows):
+    crew = User(id=2, username="delivery_crew1")
+    orders = [
+        Order(
+            id=i,
+            user_id=1,
+            delivery_crew=crew if i % 2 else None,
+            status=bool(i % 3),
+            total=Decimal("42.75"),
+            date=date(2023, 1, 1),
+        )
+        for i in range(1, rows // 4 + 2)
+    ]
+    menuitem = MenuItem(
+        id=1, title="Lemon Dessert", price=Decimal("5.25"), category=CATEGORY
+    )
+    items = [
+        OrderItem(
+            id=i,
+            order=orders[i // 4],
+            menuitem=menuitem,
+            quantity=i % 5 + 1,
+            unit_price=Decimal("5.25"),
+            line_total=Decimal("5.25") * (i % 5 + 1),
+        )
+        for i in range(1, rows + 1)
+    ]
+    return OrderItemSerializer(items, many=True).data
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare JSONRenderer and FastJSONRenderer on menu item and order "
+        "item list payloads."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--number", type=int, default=20)
+
+    def handle(self, *args, rows, repeat, number, **options):
+        if renderers.orjson is None:
+            self.stderr.write(
+                "orjson is not installed, FastJSONRenderer falls back to JSONRenderer"
+            )
+
+        payloads = {
+            "menu-items": menu_payload(rows),
+            "order-items": order_item_payload(rows),
+        }
+        for name, data in payloads.items():
+            results = {}
+            for renderer in (JSONRenderer(), FastJSONRenderer()):
+                body = renderer.render(data)
+                best = min(
+                    timeit.repeat(
+                        lambda: renderer.render(data), repeat=repeat, number=number
+                    )
+                )
+                results[type(renderer).__name__] = (body, best / number)
+
+            (slow_body, slow), (fast_body, fast) = results.values()
+            self.stdout.write(
+                f"{name}: {rows} rows, {len(slow_body)} bytes, "
+                f"JSONRenderer {slow * 1000:.2f} ms, "
+                f"FastJSONRenderer {fast * 1000:.2f} ms, "
+                f"{slow / fast:.1f}x"
+            )
+            if fast_body != slow_body:
+                self.stderr.write(self.style.ERROR(f"{name}: output differs"))
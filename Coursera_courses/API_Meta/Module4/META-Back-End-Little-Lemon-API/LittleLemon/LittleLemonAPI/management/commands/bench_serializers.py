@@ -0,0 +1,72 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from LittleLemonAPI.benchmarks import (
+    throwaway_database,
+    seed_menu,
+    seed_orders,
+    seed_users,
+)
+from LittleLemonAPI.models import Category, MenuItem, Order
+from LittleLemonAPI.serializers import (
+    CategorySerializer,
+    MenuItemSerializer,
+    OrderSerializer,
+    CategoryReadSerializer,
+    MenuItemReadSerializer,
+    OrderReadSerializer,
+)
+
+CASES = [
+    (
+        "categories",
+        Category.objects.order_by("id"),
+        CategorySerializer,
+        CategoryReadSerializer,
+    ),
+    (
+        "menu-items",
+        MenuItem.objects.select_related("category").order_by("id"),
+        MenuItemSerializer,
+        MenuItemReadSerializer,
+    ),
+    ("orders", Order.objects.order_by("id"), OrderSerializer, OrderReadSerializer),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the ModelSerializer and values() read serializer list paths "
+        "on a throwaway database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, rows, repeat, **options):
+        with throwaway_database():
+            seed_menu(rows, categories=rows)
+            seed_orders(rows, seed_users("customer", 10), seed_users("crew", 3))
+
+            for name, queryset, serializer_class, read_serializer_class in CASES:
+
+                def model_path():
+                    return serializer_class(queryset.all(), many=True).data
+
+                def values_path():
+                    serializer = read_serializer_class()
+                    return serializer.to_representation(
+                        serializer.get_rows(queryset.all())
+                    )
+
+                slow = min(timeit.repeat(model_path, repeat=repeat, number=1))
+                fast = min(timeit.repeat(values_path, repeat=repeat, number=1))
+                self.stdout.write(
+                    f"{name}: {rows} rows, {serializer_class.__name__} "
+                    f"{slow * 1000:.1f} ms, {read_serializer_class.__name__} "
+                    f"{fast * 1000:.1f} ms, {slow / fast:.1f}x"
+                )
+                if values_path() != model_path():
+                    self.stderr.write(self.style.ERROR(f"{name}: output differs"))
@@ -0,0 +1,150 @@
+from datetime import date
+from decimal import Decimal
+from itertools import combinations
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models
+from django.urls import URLPattern, URLResolver, get_resolver
+
+SAMPLE_VALUES = [
+    (models.BooleanField, True),
+    (models.DateField, date(2023, 1, 1)),
+    (models.DecimalField, Decimal("1.00")),
+    (models.CharField, "x"),
+]
+
+
+def iter_view_classes(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_view_classes(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            view_class = getattr(pattern.callback, "cls", None)
+            if view_class is not None:
+                yield view_class
+
+
+def resolve_field(model, path):
+    for name in path.split("__"):
+        field = model._meta.get_field(name)
+        model = field.related_model or model
+    return field
+
+
+def sample_value(field):
+    if field.is_relation:
+        return 1
+    for field_class, value in SAMPLE_VALUES:
+        if isinstance(field, field_class):
+            return value
+    return 1
+
+
+def plan_problems(plan, filtered):
+    """Return the index problems an EXPLAIN output shows."""
+    problems = []
+
+    if connection.vendor == "sqlite":
+        lines = plan.splitlines()
+        if filtered and any("SCAN " in line and "INDEX" not in line for line in lines):
+            problems.append("full scan")
+        if any("TEMP B-TREE FOR ORDER BY" in line for line in lines):
+            problems.append("sort")
+    elif connection.vendor == "postgresql":
+        if filtered and "Seq Scan" in plan:
+            problems.append("full scan")
+        if "Sort" in plan:
+            problems.append("sort")
+
+    return problems
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay the filter and ordering combinations declared by the API views, "
+        "EXPLAIN them and report the ones that no index serves."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--max-filters",
+            type=int,
+            default=2,
+            help="Largest number of filterset fields combined in one query.",
+        )
+        parser.add_argument(
+            "--fail",
+            action="store_true",
+            help="Exit with an error when any combination lacks an index.",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ("sqlite", "postgresql"):
+            raise CommandError(
+                f"EXPLAIN parsing is not supported on {connection.vendor}"
+            )
+
+        missing = 0
+        seen = set()
+
+        for view_class in iter_view_classes(get_resolver().url_patterns):
+            if view_class in seen:
+                continue
+            seen.add(view_class)
+            model = self.get_model(view_class)
+            if model is None:
+                continue
+            for filters, ordering in self.get_combinations(view_class, options):
+                queryset = model._default_manager.filter(
+                    **{
+                        path: sample_value(resolve_field(model, path))
+                        for path in filters
+                    }
+                )
+                if ordering:
+                    queryset = queryset.order_by(ordering)
+                problems = plan_problems(queryset.explain(), bool(filters))
+                label = (
+                    f"{view_class.__name__}: filter({', '.join(filters)}) "
+                    f"order_by({ordering or ''})"
+                )
+                if problems:
+                    missing += 1
+                    self.stdout.write(
+                        self.style.WARNING(f"{label} -> {', '.join(problems)}")
+                    )
+                elif options["verbosity"] > 1:
+                    self.stdout.write(f"{label} -> ok")
+
+        self.stdout.write(f"{missing} combination(s) without a suitable index")
+        if missing and options["fail"]:
+            raise CommandError("Some filter/ordering combinations lack an index")
+
+    def get_model(self, view_class):
+        queryset = getattr(view_class, "queryset", None)
+        if queryset is not None:
+            return queryset.model
+        serializer_class = getattr(view_class, "serializer_class", None)
+        return getattr(getattr(serializer_class, "Meta", None), "model", None)
+
+    def get_combinations(self, view_class, options):
+        """Yield (filters, ordering) pairs the view can produce."""
+        scopes = [[]] + [[field] for field in getattr(view_class, "scope_fields", [])]
+        filter_fields = list(getattr(view_class, "filterset_fields", None) or [])
+        orderings = [None] + list(getattr(view_class, "ordering_fields", None) or [])
+
+        filter_sets = [
+            list(fields)
+            for size in range(options["max_filters"] + 1)
+            for fields in combinations(filter_fields, size)
+        ]
+
+        seen = set()
+        for scope in scopes:
+            for fields in filter_sets:
+                for ordering in orderings:
+                    filters = scope + [field for field in fields if field not in scope]
+                    key = (frozenset(filters), ordering)
+                    if (filters or ordering) and key not in seen:
+                        seen.add(key)
+                        yield filters, ordering
@@ -0,0 +1,299 @@
+import json
+import math
+import random
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from LittleLemonAPI.benchmarks import (
+    throwaway_database,
+    issue_tokens,
+    seed_menu,
+    seed_orders,
+    seed_users,
+)
+from LittleLemonAPI.models import Order
+
+METRICS = ["p50_ms", "p95_ms", "p99_ms", "queries", "error_rate"]
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of a sorted list."""
+    return values[max(0, math.ceil(percent / 100 * len(values)) - 1)]
+
+
+class Traffic:
+    """
+    The request mix: each scenario picks a user of its role and returns the
+    (endpoint, method, path, body) steps to send as that user.
+    """
+
+    def __init__(self, rng, menuitems, customers, crews, managers):
+        self.rng = rng
+        self.menuitem_ids = [menuitem.id for menuitem in menuitems]
+        self.category_ids = sorted({menuitem.category_id for menuitem in menuitems})
+        self.customers = customers
+        self.crews = crews
+        self.managers = managers
+        self.order_ids = []
+        self.orders_of = defaultdict(list)
+        for order_id, user_id in Order.objects.values_list("id", "user_id")[:100000]:
+            self.order_ids.append(order_id)
+            self.orders_of[user_id].append(order_id)
+        for order_id, crew_id in Order.objects.filter(
+            delivery_crew__isnull=False
+        ).values_list("id", "delivery_crew_id")[:100000]:
+            self.orders_of[crew_id].append(order_id)
+
+        # (weight, role, scenario)
+        self.scenarios = [
+            (20, None, self.browse_menu),
+            (10, "customer", self.filter_menu),
+            (5, None, self.categories),
+            (10, "customer", self.fill_cart),
+            (5, "customer", self.checkout),
+            (10, "customer", self.own_orders),
+            (10, "customer", self.order_lines),
+            (8, "crew", self.crew_orders),
+            (4, "crew", self.crew_status),
+            (8, "manager", self.manager_orders),
+            (5, "manager", self.manager_cursor),
+            (3, "manager", self.manager_assign),
+            (2, "manager", self.manager_feature),
+        ]
+        self.weights = [weight for weight, _, _ in self.scenarios]
+
+    def next(self):
+        _, role, scenario = self.rng.choices(self.scenarios, self.weights)[0]
+        user = None
+        if role is not None:
+            user = self.rng.choice(getattr(self, f"{role}s"))
+        return user, list(scenario(user))
+
+    def cart_lines(self):
+        return [
+            {"menuitem_id": menuitem_id, "quantity": self.rng.randint(1, 3)}
+            for menuitem_id in self.rng.sample(self.menuitem_ids, 3)
+        ]
+
+    def order_of(self, user):
+        orders = self.orders_of.get(user.id)
+        return self.rng.choice(orders) if orders else None
+
+    def browse_menu(self, user):
+        page = self.rng.randint(1, 20)
+        yield "menu-items:list", "GET", f"/api/menu-items?page={page}", None
+
+    def filter_menu(self, user):
+        category = self.rng.choice(self.category_ids)
+        path = f"/api/menu-items?category={category}&ordering=price"
+        yield "menu-items:filter", "GET", path, None
+        yield "menu-items:search", "GET", "/api/menu-items?search=item 1", None
+
+    def categories(self, user):
+        yield "category:list", "GET", "/api/category", None
+
+    def fill_cart(self, user):
+        path = "/api/cart/menu-items/bulk"
+        yield "cart:bulk", "POST", path, self.cart_lines()
+        yield "cart:list", "GET", "/api/cart/menu-items", None
+
+    def checkout(self, user):
+        yield "cart:add", "POST", "/api/cart/menu-items", self.cart_lines()
+        yield "orders:checkout", "POST", "/api/orders", None
+
+    def own_orders(self, user):
+        yield "orders:list", "GET", "/api/orders", None
+
+    def order_lines(self, user):
+        order = self.order_of(user)
+        if order is not None:
+            yield "order-items:list", "GET", f"/api/orders/{order}", None
+
+    def crew_orders(self, user):
+        yield "orders:list", "GET", "/api/orders?status=0&ordering=-date", None
+
+    def crew_status(self, user):
+        order = self.order_of(user)
+        if order is not None:
+            yield "orders:status", "PATCH", f"/api/orders/{order}", None
+
+    def manager_orders(self, user):
+        path = "/api/orders?status=0&ordering=-date"
+        yield "orders:list", "GET", path, None
+
+    def manager_cursor(self, user):
+        path = "/api/orders?pagination=cursor&perpage=50"
+        yield "orders:cursor", "GET", path, None
+
+    def manager_assign(self, user):
+        order = self.rng.choice(self.order_ids)
+        crew = self.rng.choice(self.crews)
+        body = {"username": crew.username, "quantity": 1}
+        yield "orders:assign", "PUT", f"/api/orders/{order}", body
+
+    def manager_feature(self, user):
+        menuitem = self.rng.choice(self.menuitem_ids)
+        yield "menu-items:feature", "PATCH", f"/api/menu-items/{menuitem}", None
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database, drive the API routes with mixed "
+        "customer, delivery crew and manager traffic and report latency, "
+        "throughput and queries per request for each endpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--menu-items", type=int, default=2000)
+        parser.add_argument("--categories", type=int, default=20)
+        parser.add_argument("--orders", type=int, default=50000)
+        parser.add_argument("--customers", type=int, default=200)
+        parser.add_argument("--crews", type=int, default=10)
+        parser.add_argument("--managers", type=int, default=2)
+        parser.add_argument(
+            "--requests", type=int, default=2000, help="Scenarios to run."
+        )
+        parser.add_argument("--warmup", type=int, default=100)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--throttle",
+            action="store_true",
+            help="Keep the throttle rates (they are lifted by default).",
+        )
+        parser.add_argument(
+            "--budget",
+            help=(
+                "JSON file of {endpoint: {metric: limit}}, '*' for every "
+                f"endpoint. Metrics: {', '.join(METRICS)}. The command fails "
+                "when a limit is exceeded."
+            ),
+        )
+        parser.add_argument("--report", help="Write the results as JSON here.")
+
+    def handle(self, *args, **options):
+        budget = None
+        if options["budget"]:
+            with open(options["budget"]) as budget_file:
+                budget = json.load(budget_file)
+
+        rest_framework = dict(settings.REST_FRAMEWORK)
+        if not options["throttle"]:
+            rest_framework["DEFAULT_THROTTLE_RATES"] = {
+                scope: None for scope in rest_framework["DEFAULT_THROTTLE_RATES"]
+            }
+
+        with throwaway_database(), override_settings(
+            REST_FRAMEWORK=rest_framework,
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+        ):
+            traffic = self.seed(options)
+            self.run(traffic, options["warmup"])
+            started = time.perf_counter()
+            samples = self.run(traffic, options["requests"])
+            elapsed = time.perf_counter() - started
+
+        results = self.summarize(samples, elapsed)
+        self.print_report(results, elapsed)
+        if options["report"]:
+            with open(options["report"], "w") as report:
+                json.dump(results, report, indent=2)
+
+        if budget is not None:
+            violations = self.check_budget(results, budget)
+            if violations:
+                raise CommandError("Latency budget exceeded:\n" + "\n".join(violations))
+            self.stdout.write(self.style.SUCCESS("Within budget"))
+
+    def seed(self, options):
+        started = time.perf_counter()
+        menuitems = seed_menu(options["menu_items"], options["categories"])
+        customers = seed_users("customer", options["customers"])
+        crews = seed_users("crew", options["crews"], group="Delivery Crew")
+        managers = seed_users("manager", options["managers"], group="Manager")
+        seed_orders(options["orders"], customers, crews, menuitems)
+        self.tokens = issue_tokens([*customers, *crews, *managers])
+        self.stdout.write(
+            f"Seeded {len(menuitems)} menu items and {options['orders']} orders "
+            f"in {time.perf_counter() - started:.1f} s"
+        )
+        return Traffic(
+            random.Random(options["seed"]), menuitems, customers, crews, managers
+        )
+
+    def run(self, traffic, count):
+        """Send `count` scenarios, returning {endpoint: [(ms, queries, ok)]}."""
+        client = Client()
+        samples = defaultdict(list)
+        for _ in range(count):
+            user, steps = traffic.next()
+            headers = {}
+            if user is not None:
+                headers["HTTP_AUTHORIZATION"] = f"Token {self.tokens[user.id]}"
+            for endpoint, method, path, body in steps:
+                if body is not None:
+                    headers.update(
+                        data=json.dumps(body), content_type="application/json"
+                    )
+                send = getattr(client, method.lower())
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    response = send(path, **headers)
+                    duration = (time.perf_counter() - started) * 1000
+                headers.pop("data", None)
+                headers.pop("content_type", None)
+                ok = response.status_code < 400
+                samples[endpoint].append((duration, len(queries), ok))
+        return samples
+
+    def summarize(self, samples, elapsed):
+        """Per endpoint numbers; throughput is over the `elapsed` wall time."""
+        results = {}
+        for endpoint, rows in sorted(samples.items()):
+            durations = sorted(duration for duration, _, _ in rows)
+            results[endpoint] = {
+                "requests": len(rows),
+                "requests_per_s": round(len(rows) / elapsed, 1),
+                "p50_ms": round(percentile(durations, 50), 2),
+                "p95_ms": round(percentile(durations, 95), 2),
+                "p99_ms": round(percentile(durations, 99), 2),
+                "queries": round(sum(count for _, count, _ in rows) / len(rows), 2),
+                "max_queries": max(count for _, count, _ in rows),
+                "error_rate": round(sum(not ok for _, _, ok in rows) / len(rows), 4),
+            }
+        return results
+
+    def print_report(self, results, elapsed):
+        total = sum(result["requests"] for result in results.values())
+        self.stdout.write(
+            f"{'endpoint':<20} {'requests':>8} {'req/s':>8} {'p50 ms':>8} "
+            f"{'p95 ms':>8} {'p99 ms':>8} {'queries':>8} {'errors':>7}"
+        )
+        for endpoint, result in results.items():
+            self.stdout.write(
+                f"{endpoint:<20} {result['requests']:>8} "
+                f"{result['requests_per_s']:>8.1f} {result['p50_ms']:>8.2f} "
+                f"{result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} "
+                f"{result['queries']:>8.1f} {result['error_rate']:>7.1%}"
+            )
+        self.stdout.write(
+            f"{total} requests in {elapsed:.1f} s, {total / elapsed:.0f} requests/s"
+        )
+
+    def check_budget(self, results, budget):
+        violations = []
+        for endpoint, result in results.items():
+            limits = {**budget.get("*", {}), **budget.get(endpoint, {})}
+            for metric, limit in limits.items():
+                if metric not in METRICS:
+                    raise CommandError(f"Unknown budget metric {metric!r}")
+                if result[metric] > limit:
+                    violations.append(
+                        f"{endpoint}: {metric} {result[metric]} > {limit}"
+                    )
+        return violations
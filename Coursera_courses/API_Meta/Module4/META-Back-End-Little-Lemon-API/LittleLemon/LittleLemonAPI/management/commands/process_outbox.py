@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import signal
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from LittleLemonAPI.events import (
+    dead_events,
+    process_batch,
+    outbox_lag,
+    purge_processed,
+)
+
+logger = logging.getLogger("LittleLemonAPI.events")
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver pending order events from the outbox to the "
+        "LITTLELEMON_EVENT_HANDLERS in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait when the outbox is empty.",
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=10,
+            help="Give up on an event after this many failed deliveries.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit as soon as the outbox is drained.",
+        )
+
+    def handle(self, *args, **options):
+        asyncio.run(self.run(**options))
+
+    async def run(self, batch_size, poll_interval, max_attempts, once, **options):
+        stopping = asyncio.Event()
+        if not once:
+            loop = asyncio.get_running_loop()
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(signum, stopping.set)
+
+        retention_days = getattr(settings, "LITTLELEMON_OUTBOX_RETENTION_DAYS", 7)
+        delivered_total = failed_total = 0
+        last_purge = None
+
+        while not stopping.is_set():
+            started = time.monotonic()
+            delivered, failed = await sync_to_async(process_batch)(
+                batch_size, max_attempts
+            )
+            delivered_total += delivered
+            failed_total += failed
+
+            if delivered or failed:
+                lag = await sync_to_async(outbox_lag)(max_attempts)
+                dead = await sync_to_async(dead_events)(max_attempts)
+                logger.info(
+                    "outbox batch delivered=%d failed=%d duration_ms=%.1f "
+                    "lag_s=%.3f dead=%d delivered_total=%d failed_total=%d",
+                    delivered,
+                    failed,
+                    (time.monotonic() - started) * 1000,
+                    lag.total_seconds() if lag is not None else 0,
+                    dead,
+                    delivered_total,
+                    failed_total,
+                )
+            if delivered == batch_size:
+                # more is probably waiting
+                continue
+            if once:
+                break
+
+            if last_purge is None or time.monotonic() - last_purge > 3600:
+                await sync_to_async(purge_processed)(retention_days)
+                last_purge = time.monotonic()
+            try:
+                await asyncio.wait_for(stopping.wait(), poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+        self.stdout.write(
+            f"Delivered {delivered_total} event(s), {failed_total} failure(s)"
+        )
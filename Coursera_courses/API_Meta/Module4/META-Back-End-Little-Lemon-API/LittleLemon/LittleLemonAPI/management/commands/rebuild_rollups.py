@@ -0,0 +1,29 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from LittleLemonAPI.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the daily menu item, category and delivery crew sales "
+        "rollups from the orders, for every day or the days between --start "
+        "and --end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", type=date.fromisoformat)
+        parser.add_argument("--end", type=date.fromisoformat)
+        parser.add_argument(
+            "--days-per-batch",
+            type=int,
+            default=31,
+            help="Days recomputed per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        days = rebuild_rollups(
+            options["start"], options["end"], options["days_per_batch"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {days} days"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from LittleLemonAPI.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the menu item full-text search index, after menu items were "
+        "loaded or changed without save signals (bulk_create, update, loaddata)."
+    )
+
+    def handle(self, *args, **options):
+        rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt"))
@@ -0,0 +1,127 @@
+import bisect
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+# request duration histogram buckets, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+
+class RequestMetrics:
+    """
+    Measurements for one request. It is also a database execute wrapper,
+    so it counts and times every query it is installed on.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.sql = 0.0
+        # seconds per part of the request, SQL time left out
+        self.timings = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql += time.perf_counter() - started
+            self.queries += 1
+
+    def start(self):
+        return time.perf_counter(), self.sql
+
+    def stop(self, name, mark):
+        started, sql = mark
+        elapsed = time.perf_counter() - started - (self.sql - sql)
+        self.timings[name] = self.timings.get(name, 0.0) + elapsed
+
+    @contextmanager
+    def timer(self, name):
+        mark = self.start()
+        try:
+            yield
+        finally:
+            self.stop(name, mark)
+
+
+def get_metrics(request):
+    """The RequestMetrics of a sampled request, None otherwise."""
+    http_request = getattr(request, "_request", request)
+    return getattr(http_request, "littlelemon_metrics", None)
+
+
+def timed(request, name):
+    metrics = get_metrics(request)
+    return metrics.timer(name) if metrics is not None else nullcontext()
+
+
+class MetricsRegistry:
+    """
+    Prometheus-style counters and a request duration histogram, labelled
+    by view. They live in the process, so every worker reports its own.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = defaultdict(float)
+        # labels -> (count per bucket, +Inf last), and the sum of durations
+        self.buckets = defaultdict(lambda: [0] * (len(BUCKETS) + 1))
+        self.durations = defaultdict(float)
+
+    def observe(self, view, method, status, duration, metrics, size):
+        labels = (("view", view),)
+        with self.lock:
+            request_labels = labels + (("method", method), ("status", str(status)))
+            self.counters["littlelemon_requests_total", request_labels] += 1
+            self.counters["littlelemon_db_queries_total", labels] += metrics.queries
+            self.counters["littlelemon_db_seconds_total", labels] += metrics.sql
+            for name, seconds in metrics.timings.items():
+                self.counters[f"littlelemon_{name}_seconds_total", labels] += seconds
+            if size is not None:
+                self.counters["littlelemon_response_bytes_total", labels] += size
+            self.buckets[labels][bisect.bisect_left(BUCKETS, duration)] += 1
+            self.durations[labels] += duration
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.buckets.clear()
+            self.durations.clear()
+
+    def render(self):
+        """The metrics in the Prometheus text exposition format."""
+        with self.lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(
+                (labels, list(counts), self.durations[labels])
+                for labels, counts in self.buckets.items()
+            )
+
+        lines = []
+        previous = None
+        for (name, labels), value in counters:
+            if name != previous:
+                lines.append(f"# TYPE {name} counter")
+                previous = name
+            lines.append(f"{name}{format_labels(labels)} {value:g}")
+
+        name = "littlelemon_request_duration_seconds"
+        if histograms:
+            lines.append(f"# TYPE {name} histogram")
+        for labels, counts, duration in histograms:
+            total = 0
+            for bound, count in zip((*BUCKETS, "+Inf"), counts):
+                total += count
+                bucket_labels = labels + (("le", bound),)
+                lines.append(f"{name}_bucket{format_labels(bucket_labels)} {total}")
+            lines.append(f"{name}_sum{format_labels(labels)} {duration:g}")
+            lines.append(f"{name}_count{format_labels(labels)} {total}")
+        return "\n".join(lines) + "\n"
+
+
+def format_labels(labels):
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+registry = MetricsRegistry()
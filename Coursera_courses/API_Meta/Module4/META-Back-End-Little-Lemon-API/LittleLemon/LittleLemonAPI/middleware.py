@@ -0,0 +1,163 @@
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .caches import catalog_cache_is_shared, get_catalog_cache
+from .metrics import RequestMetrics, registry
+from .routers import client_key, get_replica_lag, get_replicas, use_replica
+
+logger = logging.getLogger("LittleLemonAPI.metrics")
+
+
+class MetricsMiddleware:
+    """
+    Measure a sample of requests: total time, query count and SQL time,
+    response size, and the permission/throttle/serializer/render times
+    recorded by the views' MetricsMixin.
+
+    The numbers go out as a Server-Timing header, a log line on the
+    LittleLemonAPI.metrics logger and the counters behind /api/metrics.
+    LITTLELEMON_METRICS_SAMPLE_RATE is the share of requests measured; the
+    others only pay for one random() call. Streamed bodies are measured up
+    to their last chunk and go out without the Server-Timing header.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = getattr(settings, "LITTLELEMON_METRICS_SAMPLE_RATE", 1.0)
+        if random.random() >= rate:
+            return self.get_response(request)
+
+        metrics = request.littlelemon_metrics = RequestMetrics()
+        started = time.perf_counter()
+        with self.counting_queries(metrics):
+            response = self.get_response(request)
+
+        # is_async is only there since Django 4.2
+        if response.streaming and not getattr(response, "is_async", False):
+            # the body, and the queries behind it, come after this returns:
+            # record the request once the last chunk is sent
+            response.streaming_content = self.measure_stream(
+                response.streaming_content, request, response, metrics, started
+            )
+            return response
+
+        duration = time.perf_counter() - started
+        size = None if response.streaming else len(response.content)
+        if getattr(settings, "LITTLELEMON_METRICS_SERVER_TIMING", True):
+            response["Server-Timing"] = self.server_timing(metrics, duration)
+        self.record(request, response, metrics, duration, size)
+        return response
+
+    def counting_queries(self, metrics):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(metrics))
+        return stack
+
+    def measure_stream(self, content, request, response, metrics, started):
+        size = 0
+        try:
+            while True:
+                with self.counting_queries(metrics):
+                    chunk = next(content, None)
+                if chunk is None:
+                    break
+                size += len(chunk)
+                yield chunk
+        finally:
+            duration = time.perf_counter() - started
+            self.record(request, response, metrics, duration, size)
+
+    def record(self, request, response, metrics, duration, size):
+        view = self.get_view_name(request)
+        registry.observe(
+            view, request.method, response.status_code, duration, metrics, size
+        )
+
+        timings = {
+            f"{name}_ms": seconds * 1000 for name, seconds in metrics.timings.items()
+        }
+        logger.info(
+            "request view=%s method=%s status=%d duration_ms=%.1f queries=%d "
+            "db_ms=%.1f bytes=%s %s",
+            view,
+            request.method,
+            response.status_code,
+            duration * 1000,
+            metrics.queries,
+            metrics.sql * 1000,
+            size,
+            " ".join(f"{key}={value:.1f}" for key, value in timings.items()),
+            extra={
+                "view": view,
+                "method": request.method,
+                "status": response.status_code,
+                "duration_ms": duration * 1000,
+                "queries": metrics.queries,
+                "db_ms": metrics.sql * 1000,
+                "bytes": size,
+                **timings,
+            },
+        )
+
+    def get_view_name(self, request):
+        match = request.resolver_match
+        if match is None:
+            return "unresolved"
+        view = getattr(match.func, "cls", None) or getattr(
+            match.func, "view_class", match.func
+        )
+        return view.__name__
+
+    def server_timing(self, metrics, duration):
+        entries = [f'db;dur={metrics.sql * 1000:.1f};desc="{metrics.queries} queries"']
+        entries += [
+            f"{name};dur={seconds * 1000:.1f}"
+            for name, seconds in metrics.timings.items()
+        ]
+        entries.append(f"total;dur={duration * 1000:.1f}")
+        return ", ".join(entries)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Let GET, HEAD and OPTIONS requests read from the read replicas.
+
+    A client that sent any other request is pinned to the primary for
+    LITTLELEMON_REPLICA_LAG seconds afterwards, so it reads its own writes
+    (a cart add, a checkout) even when the replicas are behind. Clients are
+    told apart by their credentials, and the pins are kept in the catalog
+    cache. Only a cache shared by every worker process can carry a pin from
+    the worker that served the write to the one serving the next read, so
+    without one every request reads from the primary.
+    """
+
+    safe_methods = ("GET", "HEAD", "OPTIONS")
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not get_replicas() or not catalog_cache_is_shared():
+            return self.get_response(request)
+
+        key = client_key(request)
+        if request.method not in self.safe_methods:
+            response = self.get_response(request)
+            if key is not None:
+                get_catalog_cache().set(key, True, get_replica_lag())
+            return response
+
+        pinned = key is not None and get_catalog_cache().get(key, False)
+        token = use_replica.set(not pinned)
+        try:
+            return self.get_response(request)
+        finally:
+            use_replica.reset(token)
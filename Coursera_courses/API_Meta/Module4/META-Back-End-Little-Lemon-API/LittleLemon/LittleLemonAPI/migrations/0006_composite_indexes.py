@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("LittleLemonAPI", "0005_alter_cart_menuitem_alter_cart_quantity_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="cart",
+            index=models.Index(fields=["user", "id"], name="cart_user_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["delivery_crew", "status", "date"],
+                name="order_crew_status_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(fields=["user", "date"], name="order_user_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(fields=["status", "date"], name="order_status_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="orderitem",
+            index=models.Index(fields=["order", "id"], name="orderitem_order_id_idx"),
+        ),
+    ]
@@ -0,0 +1,46 @@
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+
+
+def backfill_prices(apps, schema_editor):
+    # Older order lines only know the current menu price
+    OrderItem = apps.get_model("LittleLemonAPI", "OrderItem")
+    MenuItem = apps.get_model("LittleLemonAPI", "MenuItem")
+
+    OrderItem.objects.update(
+        unit_price=Subquery(
+            MenuItem.objects.filter(pk=OuterRef("menuitem_id")).values("price")[:1]
+        )
+    )
+    OrderItem.objects.update(line_total=F("unit_price") * F("quantity"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("LittleLemonAPI", "0007_outboxevent"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="orderitem",
+            name="unit_price",
+            field=models.DecimalField(decimal_places=2, max_digits=6, null=True),
+        ),
+        migrations.AddField(
+            model_name="orderitem",
+            name="line_total",
+            field=models.DecimalField(decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.RunPython(backfill_prices, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="orderitem",
+            name="unit_price",
+            field=models.DecimalField(decimal_places=2, max_digits=6),
+        ),
+        migrations.AlterField(
+            model_name="orderitem",
+            name="line_total",
+            field=models.DecimalField(decimal_places=2, max_digits=10),
+        ),
+    ]
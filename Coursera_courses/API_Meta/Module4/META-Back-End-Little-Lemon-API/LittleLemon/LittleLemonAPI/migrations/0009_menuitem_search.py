@@ -0,0 +1,47 @@
+from django.db import migrations
+
+# the tables behind LittleLemonAPI.search, one per database vendor
+CREATE_INDEX = {
+    "sqlite": [
+        "CREATE VIRTUAL TABLE littlelemonapi_menuitem_search USING fts5("
+        "title, category, tokenize='unicode61 remove_diacritics 2', "
+        "prefix='2 3')",
+        "INSERT INTO littlelemonapi_menuitem_search (rowid, title, category) "
+        "SELECT m.id, m.title, c.title FROM LittleLemonAPI_menuitem m "
+        "JOIN LittleLemonAPI_category c ON c.id = m.category_id",
+    ],
+    "postgresql": [
+        "CREATE TABLE littlelemonapi_menuitem_search ("
+        'menuitem_id bigint PRIMARY KEY REFERENCES "LittleLemonAPI_menuitem" (id) '
+        "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+        "document tsvector NOT NULL)",
+        "CREATE INDEX littlelemonapi_menuitem_search_document "
+        "ON littlelemonapi_menuitem_search USING GIN (document)",
+        "INSERT INTO littlelemonapi_menuitem_search (menuitem_id, document) "
+        "SELECT m.id, setweight(to_tsvector('simple', m.title), 'A') "
+        "|| setweight(to_tsvector('simple', c.title), 'B') "
+        'FROM "LittleLemonAPI_menuitem" m '
+        'JOIN "LittleLemonAPI_category" c ON c.id = m.category_id',
+    ],
+}
+
+
+def create_search_index(apps, schema_editor):
+    for sql in CREATE_INDEX.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in CREATE_INDEX:
+        schema_editor.execute("DROP TABLE littlelemonapi_menuitem_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("LittleLemonAPI", "0008_orderitem_unit_price_line_total"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
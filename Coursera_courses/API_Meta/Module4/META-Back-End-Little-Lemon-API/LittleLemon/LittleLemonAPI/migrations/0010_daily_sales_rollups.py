@@ -0,0 +1,101 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("LittleLemonAPI", "0009_menuitem_search"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyCategorySales",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("orders", models.PositiveIntegerField()),
+                ("quantity", models.PositiveIntegerField()),
+                ("revenue", models.DecimalField(decimal_places=2, max_digits=12)),
+                (
+                    "category",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="LittleLemonAPI.category",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("date", "category")},
+            },
+        ),
+        migrations.CreateModel(
+            name="DailyCrewSales",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("orders", models.PositiveIntegerField()),
+                ("delivered", models.PositiveIntegerField()),
+                ("quantity", models.PositiveIntegerField()),
+                ("revenue", models.DecimalField(decimal_places=2, max_digits=12)),
+                (
+                    "delivery_crew",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("date", "delivery_crew")},
+            },
+        ),
+        migrations.CreateModel(
+            name="DailyMenuItemSales",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("orders", models.PositiveIntegerField()),
+                ("quantity", models.PositiveIntegerField()),
+                ("revenue", models.DecimalField(decimal_places=2, max_digits=12)),
+                (
+                    "menuitem",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="LittleLemonAPI.menuitem",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("date", "menuitem")},
+            },
+        ),
+    ]
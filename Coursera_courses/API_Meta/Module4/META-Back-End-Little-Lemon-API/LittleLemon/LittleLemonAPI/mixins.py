@@ -0,0 +1,241 @@
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .caches import (
+    get_catalog_cache,
+    catalog_cache_is_shared,
+    catalog_cache_key,
+    table_version,
+    table_last_modified,
+)
+from .concurrency import claim_version, if_match_versions
+from .metrics import get_metrics, timed
+from .permissions import get_user_roles
+from .routers import replica_may_lag
+
+
+class NotModified(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+class CatalogCacheMixin:
+    """
+    Read-through cache for list/retrieve on the catalog viewsets.
+
+    Entries are keyed on the version counters of `cache_models` (bumped by
+    the save/delete signals in signals.py) and on the query parameters that
+    change the output, so an edit makes every older entry unreachable.
+    Nothing is cached while the catalog cache is private to each process.
+    """
+
+    cache_models = []
+
+    def get_cache_params(self):
+        params = list(getattr(self, "filterset_fields", []))
+        params += ["ordering", "search"]
+        if self.paginator is not None:
+            params.append(getattr(self.paginator, "page_query_param", None))
+            params.append(getattr(self.paginator, "page_size_query_param", None))
+        return [param for param in params if param]
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if not catalog_cache_is_shared():
+            # another process could change the rows without this one noticing
+            return handler(request, *args, **kwargs)
+
+        cache = get_catalog_cache()
+        prefix = f"{self.basename}:{self.action}:{kwargs.get(self.lookup_field, '')}"
+        key = catalog_cache_key(
+            request, prefix, self.cache_models, self.get_cache_params()
+        )
+
+        data = cache.get(key)
+        if data is not None:
+            return Response(data, status=status.HTTP_200_OK)
+
+        response = handler(request, *args, **kwargs)
+        # rows read from a lagging replica would be cached under the new versions
+        if response.status_code == status.HTTP_200_OK and not replica_may_lag(
+            self.cache_models
+        ):
+            timeout = getattr(settings, "LITTLELEMON_CATALOG_CACHE_TIMEOUT", 300)
+            cache.set(key, response.data, timeout)
+
+        return response
+
+
+class ValuesReadMixin:
+    """
+    List GETs served from QuerySet.values() rows by `read_serializer_class`
+    (a ValuesReadSerializer) instead of model instances run through
+    serializer_class. Filtering, ordering and pagination are unchanged.
+    """
+
+    read_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        if self.read_serializer_class is None:
+            return super().list(request, *args, **kwargs)
+
+        serializer = self.read_serializer_class(context=self.get_serializer_context())
+        rows = serializer.get_rows(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(rows)
+        with timed(request, "serialize"):
+            data = serializer.to_representation(rows if page is None else page)
+
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified support for GET and HEAD.
+
+    The validators come from the version counters and change times of
+    `conditional_models`, so they are known before any queryset or
+    serializer work. A matching If-None-Match or If-Modified-Since is
+    answered with 304 right after authentication, permissions and throttling.
+    The validators are only sent while the catalog cache is shared by every
+    process (see catalog_cache_is_shared()).
+    """
+
+    conditional_models = []
+    # the body depends on who is asking (e.g. orders filtered by owner)
+    conditional_per_user = True
+
+    def get_etag(self, request):
+        parts = [
+            type(self).__name__,
+            request.path,
+            request.META.get("QUERY_STRING", ""),
+            request.accepted_media_type,
+        ]
+        if self.conditional_per_user:
+            # the querysets depend on the user's roles as well as on the user
+            parts.append(str(request.user.pk))
+            parts += sorted(get_user_roles(request))
+        parts += [str(table_version(model)) for model in self.conditional_models]
+        return quote_etag(hashlib.sha1("|".join(parts).encode()).hexdigest())
+
+    def get_last_modified(self, request):
+        """
+        The last change to `conditional_models`, rounded up to the second.
+        None until that second is over: a later change within it would get
+        the same Last-Modified and be answered with a stale 304.
+        """
+        modified = math.ceil(
+            max(table_last_modified(model) for model in self.conditional_models)
+        )
+        return modified if modified <= time.time() else None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.etag = self.last_modified = None
+
+        if (
+            request.method in ("GET", "HEAD")
+            and self.conditional_models
+            and catalog_cache_is_shared()
+            # a lagging replica could return older rows under the new validators
+            and not replica_may_lag(self.conditional_models)
+        ):
+            self.etag = self.get_etag(request)
+            self.last_modified = self.get_last_modified(request)
+            response = get_conditional_response(
+                request, etag=self.etag, last_modified=self.last_modified
+            )
+            if response is not None:
+                raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+
+        if getattr(self, "etag", None) and response.status_code in (200, 304):
+            response["ETag"] = self.etag
+            if self.last_modified is not None:
+                response["Last-Modified"] = http_date(self.last_modified)
+
+        return response
+
+
+class MetricsMixin:
+    """
+    Split the time of a request sampled by MetricsMiddleware into
+    permission checks, throttling, serialization and rendering.
+    """
+
+    def check_permissions(self, request):
+        with timed(request, "permissions"):
+            super().check_permissions(request)
+
+    def check_object_permissions(self, request, obj):
+        with timed(request, "permissions"):
+            super().check_object_permissions(request, obj)
+
+    def check_throttles(self, request):
+        with timed(request, "throttles"):
+            super().check_throttles(request)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        metrics = get_metrics(self.request)
+        if metrics is not None:
+            to_representation = serializer.to_representation
+
+            def timed_to_representation(instance):
+                with metrics.timer("serialize"):
+                    return to_representation(instance)
+
+            serializer.to_representation = timed_to_representation
+        return serializer
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        metrics = get_metrics(request)
+        if metrics is not None and not getattr(response, "is_rendered", True):
+            mark = metrics.start()
+            response.add_post_render_callback(
+                lambda response: metrics.stop("render", mark)
+            )
+        return response
+
+
+class IfMatchMixin:
+    """
+    Optimistic concurrency for a model with a `version` column. Updates
+    and deletes bump the version, and with If-Match: "<version>" they only
+    go through while the row still has that version; otherwise the client
+    gets 412 and should re-read the row.
+    """
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            claim_version(serializer.instance, if_match_versions(self.request))
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            claim_version(instance, if_match_versions(self.request))
+            instance.delete()
@@ -16,6 +16,8 @@ class MenuItem(models.Model):
     price = models.DecimalField(max_digits=6, decimal_places=2, db_index=True, blank=None, null=None)
     featured = models.BooleanField(db_index=True, blank=None, null=None)
     category = models.ForeignKey(Category, on_delete=models.PROTECT, blank=None, null=None)
+    # bumped by every write, compared against If-Match (see concurrency.py)
+    version = models.PositiveIntegerField(default=1)
     
     def __str__(self):
         return str(self.title) + " (" + str(self.category) + ")"
@@ -30,6 +32,10 @@ class Cart(models.Model):
     
     class Meta:
         unique_together = ("menuitem", "user")
+        indexes = [
+            # a user's cart in a stable order
+            models.Index(fields=["user", "id"], name="cart_user_id_idx"),
+        ]
         
     def __str__(self):
         return self.user
@@ -48,7 +54,22 @@ class Order(models.Model):
     total = models.DecimalField(max_digits=6, decimal_places=2, blank=None, null=None)
     # auto_now_add=True -> Automatically set the field to now when the object is first created
     date = models.DateField(db_index=True, auto_now_add=True, blank=None, null=None)
+    # bumped by every write, compared against If-Match (see concurrency.py)
+    version = models.PositiveIntegerField(default=1)
     
+    class Meta:
+        indexes = [
+            # delivery crew's orders filtered by status, by date
+            models.Index(
+                fields=["delivery_crew", "status", "date"],
+                name="order_crew_status_date_idx",
+            ),
+            # customer's orders by date
+            models.Index(fields=["user", "date"], name="order_user_date_idx"),
+            # manager's orders filtered by status, by date
+            models.Index(fields=["status", "date"], name="order_status_date_idx"),
+        ]
+
     def __str__(self):
         return str(self.user) + " (Order# " + str(self.id) + ")"
 
@@ -57,11 +78,127 @@ class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE)
     menuitem = models.ForeignKey(MenuItem, on_delete=models.CASCADE, blank=None, null=None)
     quantity = models.SmallIntegerField(blank=None, null=None)
-    # unit_price = models.DecimalField(max_digits=6, decimal_places=2)
-    # price = models.DecimalField(max_digits=6, decimal_places=2)
+    # menu price and price * quantity when the order was placed
+    unit_price = models.DecimalField(max_digits=6, decimal_places=2)
+    line_total = models.DecimalField(max_digits=10, decimal_places=2)
     
     class Meta:
         unique_together = ("order", "menuitem")
+        indexes = [
+            # an order's items in a stable order (cursor pages)
+            models.Index(fields=["order", "id"], name="orderitem_order_id_idx"),
+        ]
         
     def __str__(self):
         return str(self.order) + " - " + str(self.menuitem)
+
+
+class OutboxEvent(models.Model):
+    # written in the same transaction as the order change it describes and
+    # delivered to the handlers by the process_outbox command
+    topic = models.CharField(max_length=64, db_index=True)
+    # not a foreign key, the order may be gone by the time the event is handled
+    order_id = models.BigIntegerField(null=True)
+    payload = models.JSONField(default=dict)
+    created = models.DateTimeField(auto_now_add=True)
+    processed = models.DateTimeField(null=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            # pending events in insertion order
+            models.Index(fields=["processed", "id"], name="outbox_pending_idx"),
+        ]
+
+    def __str__(self):
+        return self.topic + " (Order# " + str(self.order_id) + ")"
+
+
+class DailyMenuItemSales(models.Model):
+    # one row per menu item and day with orders, rebuilt by LittleLemonAPI.rollups
+    date = models.DateField()
+    menuitem = models.ForeignKey(MenuItem, on_delete=models.CASCADE)
+    orders = models.PositiveIntegerField()
+    quantity = models.PositiveIntegerField()
+    revenue = models.DecimalField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        unique_together = ("date", "menuitem")
+
+    def __str__(self):
+        return str(self.menuitem_id) + " (" + str(self.date) + ")"
+
+
+class DailyCategorySales(models.Model):
+    date = models.DateField()
+    category = models.ForeignKey(Category, on_delete=models.CASCADE)
+    orders = models.PositiveIntegerField()
+    quantity = models.PositiveIntegerField()
+    revenue = models.DecimalField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        unique_together = ("date", "category")
+
+    def __str__(self):
+        return str(self.category_id) + " (" + str(self.date) + ")"
+
+
+class DailyCrewSales(models.Model):
+    date = models.DateField()
+    delivery_crew = models.ForeignKey(User, on_delete=models.CASCADE)
+    orders = models.PositiveIntegerField()
+    # orders with status 1
+    delivered = models.PositiveIntegerField()
+    quantity = models.PositiveIntegerField()
+    revenue = models.DecimalField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        unique_together = ("date", "delivery_crew")
+
+    def __str__(self):
+        return str(self.delivery_crew_id) + " (" + str(self.date) + ")"
+
+
+class ArchivedOrder(models.Model):
+    # a delivered Order moved out of the hot table by LittleLemonAPI.archive,
+    # with the same id and fields
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    delivery_crew = models.ForeignKey(
+        User, on_delete=models.SET_NULL, related_name="+", null=True
+    )
+    status = models.BooleanField(default=True)
+    total = models.DecimalField(max_digits=6, decimal_places=2)
+    date = models.DateField()
+    version = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            # the ?history=true order lists of customers, crews and managers
+            models.Index(fields=["user", "date"], name="archivedorder_user_date_idx"),
+            models.Index(
+                fields=["delivery_crew", "date"], name="archivedorder_crew_date_idx"
+            ),
+            models.Index(fields=["date"], name="archivedorder_date_idx"),
+        ]
+
+    def __str__(self):
+        return str(self.user) + " (Order# " + str(self.id) + ")"
+
+
+class ArchivedOrderItem(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    order = models.ForeignKey(ArchivedOrder, on_delete=models.CASCADE)
+    menuitem = models.ForeignKey(MenuItem, on_delete=models.CASCADE)
+    quantity = models.SmallIntegerField()
+    unit_price = models.DecimalField(max_digits=6, decimal_places=2)
+    line_total = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["order", "id"], name="archivedorderitem_order_idx"),
+        ]
+
+    def __str__(self):
+        return str(self.order) + " - " + str(self.menuitem)
@@ -6,3 +6,72 @@ class MenuItemListPagination(pagination.PageNumberPagination):
     page_size_query_param = "perpage"
     max_page_size = 50
     page_query_param = "page"
+
+
+class OrderCursorPagination(pagination.CursorPagination):
+    # Newest first. Order.date is set on insert, so it never decreases as the
+    # id grows and ordering by id gives the (date, id) order on the primary
+    # key alone.
+    ordering = "-id"
+    page_size_query_param = "perpage"
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        # a keyset needs its own unique ordering, not the ?ordering= one
+        return (self.ordering,)
+
+
+class OrderItemCursorPagination(OrderCursorPagination):
+    ordering = "id"
+
+
+class CursorOptInPagination(pagination.BasePagination):
+    """
+    Keyset (cursor) pagination for clients that ask for it with
+    ?pagination=cursor, `fallback_class` for everybody else.
+
+    Cursor pages have no total count and cost the same at any depth.
+    A fallback_class of None leaves the list unpaginated.
+    """
+
+    cursor_class = OrderCursorPagination
+    fallback_class = pagination.PageNumberPagination
+    opt_in_query_param = "pagination"
+
+    def __init__(self):
+        self.paginator = None
+
+    def wants_cursor(self, request):
+        return (
+            request.query_params.get(self.opt_in_query_param) == "cursor"
+            or self.cursor_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.wants_cursor(request):
+            self.paginator = self.cursor_class()
+        elif self.fallback_class is not None:
+            self.paginator = self.fallback_class()
+        else:
+            return None
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    @property
+    def display_page_controls(self):
+        return getattr(self.paginator, "display_page_controls", False)
+
+    def to_html(self):
+        return self.paginator.to_html() if self.paginator is not None else ""
+
+
+class OrderListPagination(CursorOptInPagination):
+    cursor_class = OrderCursorPagination
+
+
+class OrderItemListPagination(CursorOptInPagination):
+    cursor_class = OrderItemCursorPagination
+    # order items have always been returned as one list
+    fallback_class = None
@@ -1,9 +1,51 @@
+from django.conf import settings
 from rest_framework.permissions import (
     BasePermission,
     SAFE_METHODS,
     IsAdminUser
 )
 
+from .caches import catalog_cache_is_shared, get_catalog_cache
+
+
+ROLES_KEY = "littlelemon:roles:{}"
+
+
+def get_user_roles(request):
+    """
+    Return the group names of request.user.
+
+    They are loaded at most once per request. Between requests they are
+    kept in the catalog cache until invalidate_user_roles() is called for
+    the user, but only when that cache is shared: a private one could not
+    be invalidated in the other processes, which would keep a removed
+    manager's roles there.
+    """
+    http_request = getattr(request, "_request", request)
+    roles = getattr(http_request, "littlelemon_roles", None)
+
+    if roles is None:
+        user = request.user
+        if user.is_authenticated and not catalog_cache_is_shared():
+            roles = frozenset(user.groups.values_list("name", flat=True))
+        elif user.is_authenticated:
+            cache = get_catalog_cache()
+            key = ROLES_KEY.format(user.pk)
+            roles = cache.get(key)
+            if roles is None:
+                roles = frozenset(user.groups.values_list("name", flat=True))
+                timeout = getattr(settings, "LITTLELEMON_ROLES_CACHE_TIMEOUT", 300)
+                cache.set(key, roles, timeout)
+        else:
+            roles = frozenset()
+        http_request.littlelemon_roles = roles
+
+    return roles
+
+
+def invalidate_user_roles(*user_ids):
+    get_catalog_cache().delete_many([ROLES_KEY.format(pk) for pk in user_ids])
+
 
 class IsAdmin(BasePermission):
     def has_permission(self, request, view):
@@ -12,17 +54,17 @@ class IsAdmin(BasePermission):
 
 class IsManager(BasePermission):
     def has_permission(self, request, view):
-        return request.user.groups.filter(name="Manager").exists()
+        return "Manager" in get_user_roles(request)
 
 
 class IsDeliveryCrew(BasePermission):
     def has_permission(self, request, view):
-        return request.user.groups.filter(name="Delivery Crew").exists()
+        return "Delivery Crew" in get_user_roles(request)
     
     
 class IsDeliveryCrewAndOwner(BasePermission):
     def has_permission(self, request, view):
-        return request.user.groups.filter(name="Delivery Crew").exists()
+        return "Delivery Crew" in get_user_roles(request)
 
     def has_object_permission(self, request, view, obj):
         return obj.delivery_crew == request.user
@@ -0,0 +1,180 @@
+from datetime import date
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from .models import (
+    ArchivedOrder,
+    ArchivedOrderItem,
+    DailyCategorySales,
+    DailyCrewSales,
+    DailyMenuItemSales,
+    Order,
+    OrderItem,
+)
+
+ROLLUP_MODELS = [DailyMenuItemSales, DailyCategorySales, DailyCrewSales]
+# every order is in exactly one of the hot and archive tables
+ORDER_MODELS = [Order, ArchivedOrder]
+LINE_MODELS = [OrderItem, ArchivedOrderItem]
+
+
+def sum_rows(querysets, key, fields):
+    """Add up the `fields` of the rows of `querysets` that share the `key` columns."""
+    totals = {}
+    for queryset in querysets:
+        for row in queryset:
+            total = totals.setdefault(tuple(row[column] for column in key), row)
+            if total is not row:
+                for field in fields:
+                    total[field] += row[field]
+    return totals.values()
+
+
+def menuitem_sales(dates):
+    rows = sum_rows(
+        (
+            model.objects.filter(order__date__in=dates)
+            .values("order__date", "menuitem_id")
+            .annotate(
+                orders=Count("order_id", distinct=True),
+                quantity=Sum("quantity"),
+                revenue=Sum("line_total"),
+            )
+            for model in LINE_MODELS
+        ),
+        ("order__date", "menuitem_id"),
+        ("orders", "quantity", "revenue"),
+    )
+    return [
+        DailyMenuItemSales(
+            date=row["order__date"],
+            menuitem_id=row["menuitem_id"],
+            orders=row["orders"],
+            quantity=row["quantity"],
+            revenue=row["revenue"],
+        )
+        for row in rows
+    ]
+
+
+def category_sales(dates):
+    rows = sum_rows(
+        (
+            model.objects.filter(order__date__in=dates)
+            .values("order__date", "menuitem__category_id")
+            .annotate(
+                orders=Count("order_id", distinct=True),
+                quantity=Sum("quantity"),
+                revenue=Sum("line_total"),
+            )
+            for model in LINE_MODELS
+        ),
+        ("order__date", "menuitem__category_id"),
+        ("orders", "quantity", "revenue"),
+    )
+    return [
+        DailyCategorySales(
+            date=row["order__date"],
+            category_id=row["menuitem__category_id"],
+            orders=row["orders"],
+            quantity=row["quantity"],
+            revenue=row["revenue"],
+        )
+        for row in rows
+    ]
+
+
+def crew_sales(dates):
+    # summed apart: joining the lines would count each order once per line
+    quantities = {
+        (row["order__date"], row["order__delivery_crew_id"]): row["quantity"]
+        for row in sum_rows(
+            (
+                model.objects.filter(
+                    order__date__in=dates, order__delivery_crew__isnull=False
+                )
+                .values("order__date", "order__delivery_crew_id")
+                .annotate(quantity=Sum("quantity"))
+                for model in LINE_MODELS
+            ),
+            ("order__date", "order__delivery_crew_id"),
+            ("quantity",),
+        )
+    }
+    rows = sum_rows(
+        (
+            model.objects.filter(date__in=dates, delivery_crew__isnull=False)
+            .values("date", "delivery_crew_id")
+            .annotate(
+                orders=Count("id"),
+                delivered=Count("id", filter=Q(status=True)),
+                revenue=Sum("total"),
+            )
+            for model in ORDER_MODELS
+        ),
+        ("date", "delivery_crew_id"),
+        ("orders", "delivered", "revenue"),
+    )
+    return [
+        DailyCrewSales(
+            date=row["date"],
+            delivery_crew_id=row["delivery_crew_id"],
+            orders=row["orders"],
+            delivered=row["delivered"],
+            quantity=quantities.get((row["date"], row["delivery_crew_id"]), 0),
+            revenue=row["revenue"],
+        )
+        for row in rows
+    ]
+
+
+def rebuild_days(dates):
+    """
+    Recompute the rollup rows of the given days from their orders, hot
+    and archived.
+
+    A day is always recomputed whole, so running it twice for the same
+    events, or for events that arrive out of order, gives the same rows.
+    """
+    dates = sorted(set(dates))
+    if not dates:
+        return
+    with transaction.atomic():
+        for model in ROLLUP_MODELS:
+            model.objects.filter(date__in=dates).delete()
+        DailyMenuItemSales.objects.bulk_create(menuitem_sales(dates))
+        DailyCategorySales.objects.bulk_create(category_sales(dates))
+        DailyCrewSales.objects.bulk_create(crew_sales(dates))
+
+
+def rebuild_rollups(start=None, end=None, days_per_batch=31):
+    """
+    Recompute every day between start and end (inclusive, either open),
+    days_per_batch days per transaction. Returns the number of days.
+    """
+    dates = set()
+    for model in [*ORDER_MODELS, *ROLLUP_MODELS]:
+        queryset = model.objects.all()
+        if start is not None:
+            queryset = queryset.filter(date__gte=start)
+        if end is not None:
+            queryset = queryset.filter(date__lte=end)
+        dates.update(queryset.values_list("date", flat=True).distinct())
+
+    dates = sorted(dates)
+    for first in range(0, len(dates), days_per_batch):
+        rebuild_days(dates[first : first + days_per_batch])
+    return len(dates)
+
+
+def update_rollups(events):
+    """
+    Outbox handler: recompute the days of the created, reassigned, updated
+    and deleted orders.
+    """
+    rebuild_days(
+        date.fromisoformat(event.payload["date"])
+        for event in events
+        if event.payload.get("date")
+    )
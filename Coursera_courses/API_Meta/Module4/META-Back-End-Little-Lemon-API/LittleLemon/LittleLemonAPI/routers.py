@@ -0,0 +1,69 @@
+import hashlib
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from .caches import get_catalog_cache, table_last_modified
+
+PIN_KEY = "littlelemon:pin:{}"
+
+# set by ReplicaRoutingMiddleware for the requests that may read from a replica
+use_replica = ContextVar("littlelemon_use_replica", default=False)
+
+
+def get_replicas():
+    return getattr(settings, "LITTLELEMON_READ_REPLICAS", [])
+
+
+def get_replica_lag():
+    return getattr(settings, "LITTLELEMON_REPLICA_LAG", 5)
+
+
+def reading_from_replica():
+    return use_replica.get() and bool(get_replicas())
+
+
+def replica_may_lag(models):
+    """
+    True when this request reads from a replica that may not have the last
+    changes to the models' tables yet, so its results shouldn't be cached.
+    """
+    if not reading_from_replica():
+        return False
+    cutoff = time.time() - get_replica_lag()
+    return any(table_last_modified(model) > cutoff for model in models)
+
+
+def client_key(request):
+    """Identify the client by its credentials, None for anonymous clients."""
+    credentials = request.META.get("HTTP_AUTHORIZATION") or request.COOKIES.get(
+        settings.SESSION_COOKIE_NAME
+    )
+    if not credentials:
+        return None
+    return PIN_KEY.format(hashlib.sha1(credentials.encode()).hexdigest())
+
+
+class ReplicaRouter:
+    """
+    Reads go to a random LITTLELEMON_READ_REPLICAS alias inside requests the
+    ReplicaRoutingMiddleware marked, to the primary everywhere else. Writes
+    always go to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if use_replica.get():
+            replicas = get_replicas()
+            if replicas:
+                return random.choice(replicas)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # the replicas hold the same rows as the primary
+        return True
@@ -0,0 +1,174 @@
+import re
+
+from django.db import connections, router
+from rest_framework.filters import BaseFilterBackend, SearchFilter
+from rest_framework.settings import api_settings
+
+from .models import Category, MenuItem
+
+SEARCH_TABLE = "littlelemonapi_menuitem_search"
+
+
+def search_terms(text):
+    return re.findall(r"\w+", text or "")
+
+
+class SQLiteSearchIndex:
+    """
+    FTS5 table with one row per menu item: rowid is the menu item id, the
+    title and category title are indexed with prefix indexes.
+    """
+
+    def join(self, menuitem_id):
+        return [f"{SEARCH_TABLE}.rowid = {menuitem_id}", f"{SEARCH_TABLE} MATCH %s"]
+
+    def rank(self, query):
+        # title matches count twice as much as category matches
+        return f"-bm25({SEARCH_TABLE}, 2.0, 1.0)", []
+
+    def query(self, terms):
+        # every term as a prefix, all of them required
+        return " ".join(f'"{term}"*' for term in terms)
+
+    def update(self, cursor, tables, where, params):
+        cursor.execute(
+            f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN "
+            f"(SELECT m.id FROM {tables['menuitem']} m WHERE {where})",
+            params,
+        )
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, title, category) "
+            f"SELECT m.id, m.title, c.title FROM {tables['menuitem']} m "
+            f"JOIN {tables['category']} c ON c.id = m.category_id WHERE {where}",
+            params,
+        )
+
+    def remove(self, cursor, menuitem_ids):
+        cursor.execute(
+            f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN "
+            f"({', '.join(['%s'] * len(menuitem_ids))})",
+            menuitem_ids,
+        )
+
+
+class PostgresSearchIndex:
+    """
+    Table of tsvector documents with a GIN index, one row per menu item.
+    Title words weigh more than category words.
+    """
+
+    def join(self, menuitem_id):
+        return [
+            f"{SEARCH_TABLE}.menuitem_id = {menuitem_id}",
+            f"{SEARCH_TABLE}.document @@ to_tsquery('simple', %s)",
+        ]
+
+    def rank(self, query):
+        return f"ts_rank({SEARCH_TABLE}.document, to_tsquery('simple', %s))", [query]
+
+    def query(self, terms):
+        return " & ".join(f"{term}:*" for term in terms)
+
+    def update(self, cursor, tables, where, params):
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (menuitem_id, document) "
+            "SELECT m.id, setweight(to_tsvector('simple', m.title), 'A') "
+            "|| setweight(to_tsvector('simple', c.title), 'B') "
+            f"FROM {tables['menuitem']} m "
+            f"JOIN {tables['category']} c ON c.id = m.category_id WHERE {where} "
+            "ON CONFLICT (menuitem_id) DO UPDATE SET document = EXCLUDED.document",
+            params,
+        )
+
+    def remove(self, cursor, menuitem_ids):
+        # the foreign key cascades
+        pass
+
+
+SEARCH_INDEXES = {"sqlite": SQLiteSearchIndex(), "postgresql": PostgresSearchIndex()}
+
+
+def get_search_index(using):
+    """The full-text index of a database, None where there is none."""
+    return SEARCH_INDEXES.get(connections[using].vendor)
+
+
+def update_search_index(where, params):
+    using = router.db_for_write(MenuItem)
+    index = get_search_index(using)
+    if index is not None:
+        connection = connections[using]
+        tables = {
+            "menuitem": connection.ops.quote_name(MenuItem._meta.db_table),
+            "category": connection.ops.quote_name(Category._meta.db_table),
+        }
+        with connection.cursor() as cursor:
+            index.update(cursor, tables, where, params)
+
+
+def index_menuitems(menuitem_ids):
+    """
+    Index (again) the given menu items. Saves are indexed by signals, call
+    it after bulk_create and QuerySet.update.
+    """
+    menuitem_ids = list(menuitem_ids)
+    if menuitem_ids:
+        placeholders = ", ".join(["%s"] * len(menuitem_ids))
+        update_search_index(f"m.id IN ({placeholders})", menuitem_ids)
+
+
+def index_category(category_id):
+    update_search_index("m.category_id = %s", [category_id])
+
+
+def rebuild_search_index():
+    update_search_index("1 = 1", [])
+
+
+def remove_menuitems(menuitem_ids):
+    using = router.db_for_write(MenuItem)
+    index = get_search_index(using)
+    if index is not None:
+        with connections[using].cursor() as cursor:
+            index.remove(cursor, list(menuitem_ids))
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    ?search= on the menu item full-text index: every word matches as a
+    prefix of a word in the title or category title, and results are
+    ranked by relevance unless ?ordering= is given.
+
+    On databases without a full-text index it falls back to SearchFilter
+    on the view's search_fields.
+    """
+
+    search_param = api_settings.SEARCH_PARAM
+
+    def filter_queryset(self, request, queryset, view):
+        terms = search_terms(request.query_params.get(self.search_param))
+        if not terms:
+            return queryset
+
+        index = get_search_index(queryset.db)
+        if index is None:
+            return SearchFilter().filter_queryset(request, queryset, view)
+
+        query = index.query(terms)
+        menuitem_id = (
+            f"{connections[queryset.db].ops.quote_name(MenuItem._meta.db_table)}.id"
+        )
+        # a join rather than a subquery, so the rank is computed in the same
+        # pass over the index as the match
+        queryset = queryset.extra(
+            tables=[SEARCH_TABLE], where=index.join(menuitem_id), params=[query]
+        )
+        if request.query_params.get(api_settings.ORDERING_PARAM):
+            return queryset
+        rank, params = index.rank(query)
+        return queryset.extra(
+            select={"search_rank": rank}, select_params=params
+        ).order_by("-search_rank", "id")
+
+    def get_schema_operation_parameters(self, view):
+        return SearchFilter().get_schema_operation_parameters(view)
@@ -17,7 +17,8 @@ class MenuItemSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = MenuItem
-        fields = ["id", "title", "price", "featured", "category", "category_id"]
+        fields = ["id", "title", "price", "featured", "category", "category_id", "version"]
+        read_only_fields = ["version"]
         extra_kwargs = {
             "price": {"min_value": 0},
         }
@@ -43,17 +44,48 @@ class CartSerializer(serializers.ModelSerializer):
         return f"{subtotal:.2f}"
         
 
+class CartLineListSerializer(serializers.ListSerializer):
+    def validate(self, lines):
+        # one query for the whole payload
+        menuitem_ids = {line["menuitem_id"] for line in lines}
+        self.menuitems = dict(
+            MenuItem.objects.filter(id__in=menuitem_ids).values_list("id", "title")
+        )
+        missing = sorted(menuitem_ids - set(self.menuitems))
+        if missing:
+            raise serializers.ValidationError(
+                f"Menu items {missing} do not exist"
+            )
+
+        # the last line for a menu item wins
+        return list({line["menuitem_id"]: line for line in lines}.values())
+
+
+class CartLineSerializer(serializers.Serializer):
+    menuitem_id = serializers.IntegerField()
+    # 0 removes the menu item from the cart
+    quantity = serializers.IntegerField(min_value=0, max_value=32767)
+
+    class Meta:
+        list_serializer_class = CartLineListSerializer
+
+
+class CartAddLineSerializer(CartLineSerializer):
+    quantity = serializers.IntegerField(min_value=1, max_value=32767)
+
+
 class OrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = Order
         fields = "__all__"  
-        read_only_fields = ["user", "total", "date"]
+        read_only_fields = ["user", "total", "date", "version"]
         
 
 class OrderItemSerializer(serializers.ModelSerializer):
     menuitem = serializers.StringRelatedField()
-    price = serializers.DecimalField(max_digits=6, decimal_places=2, source="menuitem.price", read_only=True)
-    subtotal = serializers.SerializerMethodField()
+    # prices stored on the order line at checkout
+    price = serializers.DecimalField(max_digits=6, decimal_places=2, source="unit_price", read_only=True)
+    subtotal = serializers.DecimalField(max_digits=10, decimal_places=2, source="line_total", read_only=True)
     status = serializers.StringRelatedField(source="order.status")
     delivery_crew = serializers.StringRelatedField(source="order.delivery_crew")
     
@@ -61,10 +93,7 @@ class OrderItemSerializer(serializers.ModelSerializer):
         model = OrderItem
         fields = ["id", "order", "menuitem_id", "menuitem", "quantity", "price", "subtotal", "status", "delivery_crew"]
         read_only_fields = ["order", "menuitem_id", "menuitem", "total", "price", "subtotal"]
-        
-    def get_subtotal(self, order:OrderItem):
-        subtotal = round(order.menuitem.price * order.quantity, 2)
-        return f"{subtotal:.2f}"
+
 
 class UserSerializer(serializers.ModelSerializer):    
     class Meta:
@@ -72,4 +101,101 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ["id", "username", "first_name", "last_name", "email", "date_joined", "is_active", "is_staff"]
         # exclude = ["password", "user_permissions"]
         read_only_fields = ["first_name", "last_name", "email", "date_joined", "is_active", "is_staff"]
-        # depth = 1
\ No newline at end of file
+        # depth = 1
+
+
+class ValuesReadSerializer:
+    """
+    Read-only, list-only twin of a ModelSerializer that works on
+    QuerySet.values() rows instead of model instances.
+
+    `columns` maps an output field to the column or lookup path that holds
+    its final value (e.g. the category title for a StringRelatedField);
+    other fields read the column of their own name. The values are
+    formatted by the field objects of `serializer_class`, so the output is
+    the same as serializer_class(queryset, many=True).data.
+    """
+
+    serializer_class = None
+    columns = {}
+
+    def __init__(self, context=None):
+        self.fields = []
+        for name, field in self.serializer_class(context=context or {}).fields.items():
+            if field.write_only:
+                continue
+            # related values come out of SQL ready to use
+            if isinstance(field, serializers.RelatedField):
+                to_representation = None
+            else:
+                to_representation = field.to_representation
+            self.fields.append((name, self.columns.get(name, name), to_representation))
+
+    def get_rows(self, queryset):
+        return queryset.values(*dict.fromkeys(column for _, column, _ in self.fields))
+
+    def to_representation(self, rows):
+        data = []
+        for row in rows:
+            item = {}
+            for name, column, to_representation in self.fields:
+                value = row[column]
+                if value is not None and to_representation is not None:
+                    value = to_representation(value)
+                item[name] = value
+            data.append(item)
+        return data
+
+
+class CategoryReadSerializer(ValuesReadSerializer):
+    serializer_class = CategorySerializer
+
+
+class MenuItemReadSerializer(ValuesReadSerializer):
+    serializer_class = MenuItemSerializer
+    # str(category) is its title
+    columns = {"category": "category__title"}
+
+
+class OrderReadSerializer(ValuesReadSerializer):
+    serializer_class = OrderSerializer
+
+
+class CrewAssignmentSerializer(serializers.Serializer):
+    order_id = serializers.IntegerField()
+    username = serializers.CharField(max_length=150)
+    # the order version the client saw, checked like If-Match
+    version = serializers.IntegerField(required=False, min_value=1)
+
+
+class DateRangeSerializer(serializers.Serializer):
+    # ?start=&end= of the reports and exports, both days included
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, data):
+        if "start" in data and "end" in data and data["start"] > data["end"]:
+            raise serializers.ValidationError("start is after end")
+        return data
+
+
+class SalesSerializer(serializers.Serializer):
+    orders = serializers.IntegerField()
+    quantity = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class MenuItemSalesSerializer(SalesSerializer):
+    menuitem_id = serializers.IntegerField()
+    menuitem = serializers.CharField(source="menuitem__title")
+
+
+class CategorySalesSerializer(SalesSerializer):
+    category_id = serializers.IntegerField()
+    category = serializers.CharField(source="category__title")
+
+
+class CrewSalesSerializer(SalesSerializer):
+    delivery_crew_id = serializers.IntegerField()
+    delivery_crew = serializers.CharField(source="delivery_crew__username")
+    delivered = serializers.IntegerField()
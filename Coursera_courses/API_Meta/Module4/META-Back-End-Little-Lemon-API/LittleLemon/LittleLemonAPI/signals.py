@@ -0,0 +1,51 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from .models import Category, MenuItem, Cart, Order, OrderItem
+from .caches import touch_table
+from .permissions import invalidate_user_roles
+from .search import index_category, index_menuitems, remove_menuitems
+
+
+# tables whose version counters drive the catalog cache and the ETags
+TRACKED_MODELS = [Category, MenuItem, Cart, Order, OrderItem]
+
+
+def bump_tracked_table(sender, **kwargs):
+    touch_table(sender)
+
+
+for model in TRACKED_MODELS:
+    post_save.connect(bump_tracked_table, sender=model)
+    post_delete.connect(bump_tracked_table, sender=model)
+
+
+@receiver(post_save, sender=MenuItem)
+def index_menuitem(sender, instance, **kwargs):
+    index_menuitems([instance.pk])
+
+
+@receiver(post_delete, sender=MenuItem)
+def unindex_menuitem(sender, instance, **kwargs):
+    remove_menuitems([instance.pk])
+
+
+@receiver(post_save, sender=Category)
+def reindex_category(sender, instance, created, **kwargs):
+    # the category title is part of its menu items' documents
+    if not created:
+        index_category(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_group_members(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        # user.groups.add/remove/clear(...)
+        if action in ("post_add", "post_remove", "post_clear"):
+            invalidate_user_roles(instance.pk)
+    elif action in ("post_add", "post_remove"):
+        # group.user_set.add/remove(...)
+        invalidate_user_roles(*pk_set)
+    elif action == "pre_clear":
+        invalidate_user_roles(*instance.user_set.values_list("pk", flat=True))
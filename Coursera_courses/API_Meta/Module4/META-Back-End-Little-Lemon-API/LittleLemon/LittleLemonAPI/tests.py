@@ -1,3 +1,1484 @@
-from django.test import TestCase
+import asyncio
+from datetime import date, datetime, timezone
+from decimal import Decimal
+import csv
+import json
+import tempfile
+import time
+from io import StringIO
+from unittest.mock import patch
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User, Group
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection, connections
+from django.db.models import Count
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import http_date
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from .balancer import CrewLoads, reset_crew_loads
+from .checkout import place_order
+from .dispatch import push_order_events
+from .events import dead_events, outbox_lag, process_batch
+from .metrics import registry
+from .management.commands.loadtest import Command as LoadTestCommand, percentile
+from .renderers import FastJSONRenderer
+from .throttles import SlidingWindowRateThrottle, throttle_stats
+from .models import (
+    ArchivedOrder,
+    ArchivedOrderItem,
+    Category,
+    MenuItem,
+    Cart,
+    Order,
+    OrderItem,
+    OutboxEvent,
+    DailyMenuItemSales,
+)
+from .serializers import (
+    CategorySerializer,
+    MenuItemSerializer,
+    OrderSerializer,
+    CategoryReadSerializer,
+    MenuItemReadSerializer,
+    OrderReadSerializer,
+)
+
+
+class LittleLemonTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager_group = Group.objects.create(name="Manager")
+        cls.crew_group = Group.objects.create(name="Delivery Crew")
+        cls.customer = User.objects.create_user("customer1", password="littlelemon")
+        cls.manager = User.objects.create_user("manager1", password="littlelemon")
+        cls.manager.groups.add(cls.manager_group)
+        cls.crew = User.objects.create_user("delivery_crew1", password="littlelemon")
+        cls.crew.groups.add(cls.crew_group)
+        cls.category = Category.objects.create(slug="mains", title="Mains")
+
+    def setUp(self):
+        # throttle history and cached responses live in the caches
+        self.clear_caches()
+
+    def clear_caches(self):
+        for cache in caches.all():
+            cache.clear()
+        reset_crew_loads()
+
+    def assertQueryCountConstant(self, url, add_rows, user=None):
+        """Fail when GET url runs more queries after add_rows() added more rows."""
+        self.client.force_authenticate(user)
+        counts = []
+
+        for step in range(2):
+            if step:
+                add_rows()
+            self.clear_caches()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            counts.append(len(queries))
+
+        self.assertEqual(
+            counts[1], counts[0], f"{url} query count grew with the number of rows"
+        )
+
+    def create_menu_items(self, count, price="2.50"):
+        return MenuItem.objects.bulk_create(
+            [
+                MenuItem(
+                    title=f"Item {i}",
+                    price=Decimal(price),
+                    featured=False,
+                    category=self.category,
+                )
+                for i in range(count)
+            ]
+        )
+
+    def add_order_lines(self, order, menuitems, quantity=1):
+        return OrderItem.objects.bulk_create(
+            [
+                OrderItem(
+                    order=order,
+                    menuitem=menuitem,
+                    quantity=quantity,
+                    unit_price=menuitem.price,
+                    line_total=menuitem.price * quantity,
+                )
+                for menuitem in menuitems
+            ]
+        )
+
+    def fill_cart(self, user, count, price="2.50"):
+        Cart.objects.bulk_create(
+            [
+                Cart(user=user, menuitem=menuitem, quantity=2)
+                for menuitem in self.create_menu_items(count, price)
+            ]
+        )
+
+    def create_order(self, user, lines):
+        order = Order.objects.create(user=user, delivery_crew=self.crew, total=0)
+        self.add_order_lines(order, self.create_menu_items(lines))
+        return order
+
+
+class ListQueryCountTests(LittleLemonTestCase):
+    def test_menu_items(self):
+        self.create_menu_items(2)
+        self.assertQueryCountConstant(
+            "/api/menu-items?perpage=50", lambda: self.create_menu_items(10)
+        )
+
+    def test_categories(self):
+        def add_categories():
+            for i in range(5):
+                Category.objects.create(slug=f"category-{i}", title=f"Category {i}")
+
+        self.assertQueryCountConstant("/api/category", add_categories)
+
+    def test_cart(self):
+        self.fill_cart(self.customer, 2)
+        self.assertQueryCountConstant(
+            "/api/cart/menu-items",
+            lambda: self.fill_cart(self.customer, 10),
+            user=self.customer,
+        )
+
+    def test_orders(self):
+        self.create_order(self.customer, 1)
+        self.assertQueryCountConstant(
+            "/api/orders",
+            lambda: [self.create_order(self.customer, 1) for i in range(5)],
+            user=self.manager,
+        )
+
+    def test_order_items(self):
+        order = self.create_order(self.customer, 2)
+
+        def add_lines():
+            self.add_order_lines(order, self.create_menu_items(10))
+
+        self.assertQueryCountConstant(
+            f"/api/orders/{order.id}", add_lines, user=self.customer
+        )
+
+
+class ReadSerializerContractTests(LittleLemonTestCase):
+    def assertSameOutput(self, queryset, serializer_class, read_serializer_class):
+        serializer = read_serializer_class()
+        self.assertEqual(
+            serializer.to_representation(serializer.get_rows(queryset)),
+            serializer_class(queryset, many=True).data,
+        )
+
+    def test_categories(self):
+        Category.objects.create(slug="desserts", title="Desserts \u00e9")
+        self.assertSameOutput(
+            Category.objects.order_by("id"), CategorySerializer, CategoryReadSerializer
+        )
+
+    def test_menu_items(self):
+        self.create_menu_items(2, price="0.50")
+        MenuItem.objects.create(
+            title="Lemon Tart",
+            price=Decimal("1234.5"),
+            featured=True,
+            category=self.category,
+        )
+        self.assertSameOutput(
+            MenuItem.objects.order_by("id"), MenuItemSerializer, MenuItemReadSerializer
+        )
+
+    def test_orders(self):
+        self.create_order(self.customer, 1)
+        Order.objects.create(user=self.customer, status=True, total=Decimal("7.1"))
+        self.assertSameOutput(
+            Order.objects.order_by("id"), OrderSerializer, OrderReadSerializer
+        )
+
+    def test_list_endpoints(self):
+        self.create_menu_items(3)
+        self.create_order(self.customer, 1)
+        self.client.force_authenticate(self.manager)
+
+        for url, queryset, serializer_class in [
+            (
+                "/api/category?ordering=id",
+                Category.objects.order_by("id"),
+                CategorySerializer,
+            ),
+            (
+                "/api/menu-items?ordering=-id",
+                MenuItem.objects.order_by("-id"),
+                MenuItemSerializer,
+            ),
+            (
+                "/api/orders?pagination=cursor",
+                Order.objects.order_by("-id"),
+                OrderSerializer,
+            ),
+        ]:
+            response = self.client.get(url)
+            data = response.data.get("results", response.data)
+            self.assertEqual(data, serializer_class(queryset, many=True).data, url)
+
+
+class CatalogCacheTests(LittleLemonTestCase):
+    def test_repeated_get_is_served_from_cache(self):
+        self.create_menu_items(3)
+        self.client.get("/api/menu-items?featured=False&perpage=50")
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/menu-items?perpage=50&featured=False&x=1")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 3)
+
+    def test_menu_item_save_invalidates(self):
+        menuitem = self.create_menu_items(1)[0]
+        self.client.get(f"/api/menu-items/{menuitem.id}")
+
+        menuitem.title = "Lemon Tart"
+        menuitem.save()
+
+        response = self.client.get(f"/api/menu-items/{menuitem.id}")
+        self.assertEqual(response.data["title"], "Lemon Tart")
+
+    def test_category_change_invalidates_menu_items(self):
+        self.create_menu_items(1)
+        self.client.get("/api/menu-items")
+
+        self.category.title = "Desserts"
+        self.category.save()
+
+        response = self.client.get("/api/menu-items")
+        self.assertEqual(response.data["results"][0]["category"], "Desserts")
+
+
+class UnsharedCacheTests(LittleLemonTestCase):
+    @override_settings(LITTLELEMON_SHARED_CACHE=False)
+    def test_no_cache_or_validators_when_cache_is_per_process(self):
+        self.create_menu_items(2)
+        self.client.force_authenticate(self.customer)
+        response = self.client.get("/api/menu-items")
+        self.assertNotIn("ETag", response)
+
+        MenuItem.objects.filter(title="Item 0").update(title="Renamed")
+        response = self.client.get("/api/menu-items")
+
+        self.assertIn("Renamed", [item["title"] for item in response.data["results"]])
+
+
+class ConditionalGetTests(LittleLemonTestCase):
+    def a_second_later(self):
+        clock = patch("LittleLemonAPI.mixins.time").start()
+        clock.time.return_value = time.time() + 1
+        self.addCleanup(patch.stopall)
+
+    def test_menu_items_not_modified(self):
+        self.create_menu_items(2)
+        self.a_second_later()
+        response = self.client.get("/api/menu-items")
+        self.assertIn("Last-Modified", response)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                "/api/menu-items", HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_if_modified_since(self):
+        self.a_second_later()
+        response = self.client.get("/api/category")
+
+        response = self.client.get(
+            "/api/category", HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_no_last_modified_within_its_second(self):
+        response = self.client.get("/api/category")
+
+        self.assertIn("ETag", response)
+        self.assertNotIn("Last-Modified", response)
+        # a change in the same second still shows
+        Category.objects.create(slug="drinks", title="Drinks")
+        response = self.client.get(
+            "/api/category", HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 1)
+        )
+        self.assertEqual(response.data["count"], 2)
+
+    def test_orders_etag_changes_after_checkout(self):
+        self.client.force_authenticate(self.customer)
+        etag = self.client.get("/api/orders")["ETag"]
+
+        self.fill_cart(self.customer, 1)
+        self.client.post("/api/orders")
+        response = self.client.get("/api/orders", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 1)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_etag_is_per_user(self):
+        self.client.force_authenticate(self.customer)
+        etag = self.client.get("/api/orders")["ETag"]
+
+        self.client.force_authenticate(self.manager)
+        response = self.client.get("/api/orders", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+
+
+class RoleCacheTests(LittleLemonTestCase):
+    def group_queries(self, url, user):
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [q for q in queries if "auth_group" in q["sql"]]
+
+    def test_roles_loaded_once_per_request_and_cached(self):
+        order = Order.objects.create(user=self.customer, total=0)
+        url = f"/api/orders/{order.id}"
+
+        self.assertEqual(len(self.group_queries(url, self.manager)), 1)
+        self.assertEqual(len(self.group_queries(url, self.manager)), 0)
+
+    def test_group_change_invalidates_roles(self):
+        Order.objects.create(user=self.customer, total=0)
+        self.client.force_authenticate(self.manager)
+        self.assertEqual(self.client.get("/api/orders").data["count"], 1)
+
+        self.manager.groups.remove(self.manager_group)
+
+        self.assertEqual(self.client.get("/api/orders").data["count"], 0)
+
+    def test_delivery_crew_post_invalidates_roles(self):
+        Order.objects.create(user=self.manager, delivery_crew=self.customer, total=0)
+        self.client.force_authenticate(self.customer)
+        self.assertEqual(self.client.get("/api/orders").data["count"], 0)
+
+        self.client.force_authenticate(self.manager)
+        self.client.post("/api/groups/delivery-crew/users", {"username": "customer1"})
+
+        self.client.force_authenticate(self.customer)
+        self.assertEqual(self.client.get("/api/orders").data["count"], 1)
+
+    @override_settings(LITTLELEMON_SHARED_CACHE=False)
+    def test_roles_not_kept_between_requests_without_shared_cache(self):
+        order = Order.objects.create(user=self.customer, total=0)
+        url = f"/api/orders/{order.id}"
+
+        self.assertEqual(len(self.group_queries(url, self.manager)), 1)
+        self.assertEqual(len(self.group_queries(url, self.manager)), 1)
+
+
+class CursorPaginationTests(LittleLemonTestCase):
+    def test_orders_cursor_walk(self):
+        orders = [Order.objects.create(user=self.customer, total=0) for i in range(5)]
+        self.client.force_authenticate(self.manager)
+
+        seen = []
+        url = "/api/orders?pagination=cursor&perpage=2"
+        while url:
+            response = self.client.get(url)
+            self.assertNotIn("count", response.data)
+            seen += [order["id"] for order in response.data["results"]]
+            url = response.data["next"]
+
+        self.assertEqual(seen, [order.id for order in reversed(orders)])
+
+    def test_orders_page_numbers_by_default(self):
+        Order.objects.create(user=self.customer, total=0)
+        self.client.force_authenticate(self.manager)
+
+        response = self.client.get("/api/orders?page=1")
+
+        self.assertEqual(response.data["count"], 1)
+
+    def test_order_items_cursor_opt_in(self):
+        order = Order.objects.create(user=self.customer, total=0)
+        self.add_order_lines(order, self.create_menu_items(3))
+        self.client.force_authenticate(self.customer)
+
+        self.assertEqual(len(self.client.get(f"/api/orders/{order.id}").data), 3)
+        response = self.client.get(
+            f"/api/orders/{order.id}?pagination=cursor&perpage=2"
+        )
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertIsNotNone(response.data["next"])
+
+
+class IndexAdvisorTests(LittleLemonTestCase):
+    def test_reports_only_unindexed_combinations(self):
+        out = StringIO()
+        call_command("index_advisor", stdout=out)
+        report = out.getvalue()
+
+        self.assertIn("OrdersView: filter() order_by(total) -> sort", report)
+        self.assertNotIn(
+            "OrdersView: filter(delivery_crew, status) order_by(date)", report
+        )
+        self.assertNotIn("OrdersView: filter(user) order_by(date)", report)
+
+
+received_events = []
+
+
+def record_events(events):
+    received_events.extend(event.topic for event in events)
+
+
+def failing_handler(events):
+    raise RuntimeError("downstream is down")
+
+
+class OutboxTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        received_events.clear()
+
+    def test_order_changes_write_events(self):
+        self.fill_cart(self.customer, 1)
+        self.client.force_authenticate(self.customer)
+        self.client.post("/api/orders")
+        order = Order.objects.get()
+
+        self.client.force_authenticate(self.manager)
+        self.client.put(
+            f"/api/orders/{order.id}", {"username": "delivery_crew1", "quantity": 1}
+        )
+        self.client.patch(f"/api/orders/{order.id}")
+        self.client.delete(f"/api/orders/{order.id}")
+
+        self.assertEqual(
+            list(OutboxEvent.objects.order_by("id").values_list("topic", flat=True)),
+            [
+                "order.created",
+                "order.crew_assigned",
+                "order.status_changed",
+                "order.deleted",
+            ],
+        )
+
+    @override_settings(
+        LITTLELEMON_EVENT_HANDLERS=["LittleLemonAPI.tests.record_events"]
+    )
+    def test_process_batch_delivers_once(self):
+        order = Order.objects.create(user=self.customer, total=0)
+        OutboxEvent.objects.create(topic="order.created", order_id=order.id)
+
+        self.assertEqual(process_batch(), (1, 0))
+        self.assertEqual(process_batch(), (0, 0))
+        self.assertEqual(received_events, ["order.created"])
+
+    @override_settings(
+        LITTLELEMON_EVENT_HANDLERS=["LittleLemonAPI.tests.failing_handler"]
+    )
+    def test_failed_events_stay_pending(self):
+        OutboxEvent.objects.create(topic="order.created", order_id=1)
+
+        with self.assertLogs("LittleLemonAPI.events", "ERROR"):
+            self.assertEqual(process_batch(), (0, 1))
+
+        event = OutboxEvent.objects.get()
+        self.assertIsNone(event.processed)
+        self.assertEqual(event.attempts, 1)
+
+    def test_dead_events_are_not_lag(self):
+        OutboxEvent.objects.create(topic="order.created", order_id=1, attempts=10)
+
+        self.assertIsNone(outbox_lag())
+        self.assertEqual(dead_events(), 1)
+
+        OutboxEvent.objects.create(topic="order.created", order_id=2)
+        self.assertIsNotNone(outbox_lag())
+        self.assertEqual(dead_events(max_attempts=11), 0)
+
+
+@override_settings(LITTLELEMON_EVENT_HANDLERS=["LittleLemonAPI.tests.record_events"])
+class ProcessOutboxCommandTests(TransactionTestCase):
+    def test_drains_outbox(self):
+        received_events.clear()
+        OutboxEvent.objects.bulk_create(
+            [OutboxEvent(topic="order.created", order_id=i) for i in range(5)]
+        )
+
+        call_command("process_outbox", "--once", "--batch-size=2", stdout=StringIO())
+
+        self.assertEqual(len(received_events), 5)
+        self.assertFalse(OutboxEvent.objects.filter(processed__isnull=True).exists())
+
+
+THROTTLED_SETTINGS = {
+    "DEFAULT_THROTTLE_RATES": {
+        "anon": "3/minute",
+        "user": "200/minute",
+        "checkout": "1/minute",
+        "menu": "100/minute",
+    },
+}
+
+
+class ThrottleTests(LittleLemonTestCase):
+    @override_settings(REST_FRAMEWORK=THROTTLED_SETTINGS)
+    def test_anon_limit_and_counters(self):
+        codes = [self.client.get("/api/category").status_code for i in range(4)]
+
+        self.assertEqual(codes, [200, 200, 200, 429])
+        self.assertEqual(throttle_stats(["anon"]), {"anon": {"hit": 3, "deny": 1}})
+
+    @override_settings(REST_FRAMEWORK=THROTTLED_SETTINGS)
+    def test_checkout_scope_only_limits_post(self):
+        self.client.force_authenticate(self.customer)
+        self.fill_cart(self.customer, 1)
+
+        self.assertEqual(self.client.post("/api/orders").status_code, 201)
+        self.assertEqual(self.client.post("/api/orders").status_code, 429)
+        self.assertEqual(self.client.get("/api/orders").status_code, 200)
+
+    def test_previous_window_is_weighted(self):
+        class Throttle(SlidingWindowRateThrottle):
+            scope = "user"
+            rate = "4/minute"
+
+            def get_rate(self):
+                return self.rate
+
+            def get_cache_key(self, request, view):
+                return "test"
+
+        throttle = Throttle()
+        throttle.timer = lambda: 60 * 1000 + 50
+        for i in range(4):
+            self.assertTrue(throttle.allow_request(None, None))
+
+        # 45s into the next window a quarter of the previous window still counts
+        throttle.timer = lambda: 60 * 1001 + 45
+        self.assertTrue(throttle.allow_request(None, None))
+        self.assertTrue(throttle.allow_request(None, None))
+        self.assertTrue(throttle.allow_request(None, None))
+        self.assertFalse(throttle.allow_request(None, None))
+
+    def test_denied_requests_are_not_counted(self):
+        class Throttle(SlidingWindowRateThrottle):
+            scope = "user"
+
+            def get_rate(self):
+                return "2/minute"
+
+            def get_cache_key(self, request, view):
+                return "test"
+
+        throttle = Throttle()
+        throttle.timer = lambda: 60 * 1000 + 50
+        allowed = [throttle.allow_request(None, None) for i in range(7)]
+        self.assertEqual(allowed, [True, True] + [False] * 5)
+
+        # half of the two allowed requests still counts, the retries don't
+        throttle.timer = lambda: 60 * 1001 + 30
+        self.assertTrue(throttle.allow_request(None, None))
+        self.assertFalse(throttle.allow_request(None, None))
+
+
+class CartBulkTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.customer)
+        self.menuitems = self.create_menu_items(3)
+
+    def test_add_update_and_remove(self):
+        first, second, third = self.menuitems
+        Cart.objects.create(user=self.customer, menuitem=first, quantity=1)
+        Cart.objects.create(user=self.customer, menuitem=second, quantity=1)
+
+        with self.assertNumQueries(6):
+            response = self.client.post(
+                "/api/cart/menu-items/bulk",
+                [
+                    {"menuitem_id": first.id, "quantity": 5},
+                    {"menuitem_id": second.id, "quantity": 0},
+                    {"menuitem_id": third.id, "quantity": 2},
+                ],
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            dict(
+                Cart.objects.filter(user=self.customer).values_list(
+                    "menuitem_id", "quantity"
+                )
+            ),
+            {first.id: 5, third.id: 2},
+        )
+
+    def test_unknown_menu_item_changes_nothing(self):
+        response = self.client.post(
+            "/api/cart/menu-items/bulk",
+            [
+                {"menuitem_id": self.menuitems[0].id, "quantity": 1},
+                {"menuitem_id": 999, "quantity": 1},
+            ],
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Cart.objects.exists())
+
+    def test_cart_post_with_duplicate_updates_quantity(self):
+        menuitem = self.menuitems[0]
+        Cart.objects.create(user=self.customer, menuitem=menuitem, quantity=1)
+
+        response = self.client.post(
+            "/api/cart/menu-items",
+            [{"menuitem_id": menuitem.id, "quantity": 3}],
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Cart.objects.get(user=self.customer).quantity, 3)
+
+
+class CheckoutTests(LittleLemonTestCase):
+    def checkout_queries(self, cart_size):
+        self.fill_cart(self.customer, cart_size)
+        self.client.force_authenticate(self.customer)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post("/api/orders")
+
+        self.assertEqual(response.status_code, 201)
+        return len(queries)
+
+    def test_checkout_creates_order_with_decimal_total(self):
+        self.fill_cart(self.customer, 3, price="1.10")
+        self.client.force_authenticate(self.customer)
+
+        response = self.client.post("/api/orders")
+
+        self.assertEqual(response.status_code, 201)
+        order = Order.objects.get(user=self.customer)
+        self.assertEqual(order.total, Decimal("6.60"))
+        self.assertEqual(OrderItem.objects.filter(order=order).count(), 3)
+        self.assertFalse(Cart.objects.filter(user=self.customer).exists())
+
+    def test_order_lines_keep_checkout_price(self):
+        self.fill_cart(self.customer, 1, price="4.00")
+        self.client.force_authenticate(self.customer)
+        self.client.post("/api/orders")
+        MenuItem.objects.update(price=Decimal("9.99"))
+
+        order = Order.objects.get(user=self.customer)
+        line = self.client.get(f"/api/orders/{order.id}").data[0]
+
+        self.assertEqual((line["price"], line["subtotal"]), ("4.00", "8.00"))
+
+    def test_checkout_query_count_does_not_grow_with_cart(self):
+        single = self.checkout_queries(1)
+        Order.objects.all().delete()
+
+        self.assertEqual(self.checkout_queries(15), single)
+        self.assertLessEqual(single, 9)
+
+    def test_checkout_empty_cart(self):
+        self.client.force_authenticate(self.customer)
+
+        response = self.client.post("/api/orders")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
+
+
+class MenuSearchTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        desserts = Category.objects.create(slug="desserts", title="Desserts")
+        for title, category in [
+            ("Lemon Dessert", desserts),
+            ("Grilled Fish", self.category),
+            ("Lemon Chicken", self.category),
+            ("Crème brûlée", desserts),
+        ]:
+            MenuItem.objects.create(
+                title=title, price=Decimal("5.00"), featured=False, category=category
+            )
+        self.client.force_authenticate(self.customer)
+
+    def search(self, query, **params):
+        response = self.client.get("/api/menu-items", {"search": query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [item["title"] for item in response.data["results"]]
+
+    def test_prefix_match_on_every_word(self):
+        self.assertEqual(self.search("lem"), ["Lemon Dessert", "Lemon Chicken"])
+        self.assertEqual(self.search("lem chi"), ["Lemon Chicken"])
+        self.assertEqual(self.search("creme"), ["Crème brûlée"])
+
+    def test_title_ranks_above_category(self):
+        self.assertEqual(self.search("dessert"), ["Lemon Dessert", "Crème brûlée"])
+
+    def test_ordering_param_overrides_rank(self):
+        self.assertEqual(
+            self.search("dessert", ordering="title"), ["Crème brûlée", "Lemon Dessert"]
+        )
+
+    def test_index_follows_saves_and_deletes(self):
+        MenuItem.objects.get(title="Grilled Fish").delete()
+        self.assertEqual(self.search("fish"), [])
+
+        desserts = Category.objects.get(slug="desserts")
+        desserts.title = "Sweets"
+        desserts.save()
+        self.assertEqual(self.search("sweet"), ["Lemon Dessert", "Crème brûlée"])
+
+        menuitem = MenuItem.objects.get(title="Lemon Dessert")
+        menuitem.title = "Lime Tart"
+        menuitem.save()
+        self.assertEqual(self.search("lemon"), ["Lemon Chicken"])
+        self.assertEqual(self.search("tart"), ["Lime Tart"])
+
+    def test_punctuation_is_not_query_syntax(self):
+        self.assertEqual(self.search('"lemon" chicken*'), ["Lemon Chicken"])
+        self.assertEqual(self.search("lemon OR fish"), [])
+        self.assertEqual(len(self.search("*")), 4)
+
+
+class SalesRollupTests(LittleLemonTestCase):
+    def checkout(self, cart_size):
+        self.fill_cart(self.customer, cart_size, price="1.50")
+        self.client.force_authenticate(self.customer)
+        self.client.post("/api/orders")
+        return Order.objects.latest("id")
+
+    def report(self, name, **params):
+        self.client.force_authenticate(self.manager)
+        response = self.client.get(f"/api/reports/{name}", params)
+        self.assertEqual(response.status_code, 200)
+        return response.data["results"]
+
+    def test_outbox_keeps_rollups_current(self):
+        order = self.checkout(2)
+        self.checkout(1)
+        process_batch()
+
+        self.assertEqual(
+            self.report("categories"),
+            [
+                {
+                    "orders": 2,
+                    "quantity": 6,
+                    "revenue": "9.00",
+                    "category_id": self.category.id,
+                    "category": "Mains",
+                }
+            ],
+        )
+
+        self.client.force_authenticate(self.manager)
+        self.client.put(
+            f"/api/orders/{order.id}", {"username": "delivery_crew1", "quantity": 1}
+        )
+        self.client.force_authenticate(self.crew)
+        self.client.patch(f"/api/orders/{order.id}")
+        process_batch()
+        crew = self.report("delivery-crew")
+        # the other order was given to the only crew by the balancer
+        self.assertEqual(
+            [(row["delivery_crew"], row["orders"], row["delivered"]) for row in crew],
+            [("delivery_crew1", 2, 1)],
+        )
+
+        self.client.force_authenticate(self.manager)
+        self.client.delete(f"/api/orders/{order.id}")
+        process_batch()
+        crew = self.report("delivery-crew")
+        self.assertEqual(
+            [(row["delivery_crew"], row["orders"], row["delivered"]) for row in crew],
+            [("delivery_crew1", 1, 0)],
+        )
+        self.assertEqual(len(self.report("menu-items")), 1)
+
+    def test_rebuild_and_date_range(self):
+        old = self.create_order(self.customer, 2)
+        Order.objects.filter(id=old.id).update(date=date(2024, 1, 31))
+        self.create_order(self.customer, 1)
+
+        call_command("rebuild_rollups", stdout=StringIO())
+
+        self.assertEqual(len(self.report("menu-items")), 3)
+        january = self.report("menu-items", start="2024-01-01", end="2024-01-31")
+        self.assertEqual([row["revenue"] for row in january], ["2.50", "2.50"])
+        self.assertEqual(self.report("delivery-crew")[0]["orders"], 2)
+
+    def test_reports_are_for_managers(self):
+        self.client.force_authenticate(self.customer)
+        self.assertEqual(self.client.get("/api/reports/categories").status_code, 403)
+
+        self.client.force_authenticate(self.manager)
+        response = self.client.get(
+            "/api/reports/categories", {"start": "2024-02-01", "end": "2024-01-01"}
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class OrderExportTests(LittleLemonTestCase):
+    def export(self, **params):
+        self.client.force_authenticate(self.manager)
+        response = self.client.get("/api/orders/export", params)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv_has_a_row_per_order_line(self):
+        order = self.create_order(self.customer, 2)
+        self.create_order(self.manager, 1)
+
+        rows = list(csv.reader(StringIO(self.export())))
+
+        self.assertEqual(rows[0][:3], ["order", "date", "status"])
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(
+            rows[1][2:8],
+            [
+                "False",
+                "customer1",
+                "delivery_crew1",
+                "0.00",
+                str(order.orderitem_set.first().menuitem_id),
+                "Item 0",
+            ],
+        )
+
+    def test_ndjson_with_order_filters(self):
+        delivered = self.create_order(self.customer, 2)
+        Order.objects.filter(id=delivered.id).update(status=True)
+        self.create_order(self.customer, 1)
+
+        lines = self.export(output="ndjson", status=1).splitlines()
+
+        self.assertEqual(len(lines), 2)
+        line = json.loads(lines[0])
+        self.assertEqual((line["order"], line["status"]), (delivered.id, True))
+        self.assertEqual((line["price"], line["subtotal"]), ("2.50", "2.50"))
+
+    def test_export_is_for_managers(self):
+        self.client.force_authenticate(self.customer)
+        self.assertEqual(self.client.get("/api/orders/export").status_code, 403)
+
+        self.client.force_authenticate(self.manager)
+        response = self.client.get("/api/orders/export", {"output": "xlsx"})
+        self.assertEqual(response.status_code, 400)
+
+
+class OptimisticConcurrencyTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.menuitem = self.create_menu_items(1)[0]
+        self.client.force_authenticate(self.manager)
+
+    def test_toggle_is_one_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(f"/api/menu-items/{self.menuitem.id}")
+
+        self.assertEqual(response.data["version"], 2)
+        menuitem_queries = [
+            query["sql"] for query in queries if "menuitem" in query["sql"]
+        ]
+        self.assertEqual(len(menuitem_queries), 1)
+        self.assertTrue(menuitem_queries[0].startswith("UPDATE"))
+
+        self.client.patch(f"/api/menu-items/{self.menuitem.id}")
+        self.menuitem.refresh_from_db()
+        self.assertEqual((self.menuitem.featured, self.menuitem.version), (False, 3))
+
+    def test_toggle_without_returning(self):
+        order = self.create_order(self.customer, 1)
+
+        with patch(
+            "LittleLemonAPI.concurrency.can_update_returning", return_value=False
+        ):
+            response = self.client.patch(f"/api/orders/{order.id}")
+
+        self.assertEqual(response.data["version"], 2)
+        order.refresh_from_db()
+        self.assertTrue(order.status)
+        self.assertEqual(self.client.patch("/api/menu-items/999").status_code, 404)
+
+    def test_if_match(self):
+        path = f"/api/menu-items/{self.menuitem.id}"
+        body = {"title": "Soup", "price": "3.00", "featured": False, "category_id": 1}
+
+        stale = self.client.patch(path, HTTP_IF_MATCH='"2"')
+        self.assertEqual(stale.status_code, 412)
+        self.assertEqual(self.client.patch(path, HTTP_IF_MATCH='"1"').status_code, 200)
+
+        response = self.client.put(path, {**body, "category_id": self.category.id})
+        self.assertEqual((response.status_code, response.data["version"]), (200, 3))
+        self.assertEqual(
+            self.client.put(path, body, HTTP_IF_MATCH='W/"3"').status_code, 412
+        )
+        self.assertEqual(
+            self.client.delete(path, HTTP_IF_MATCH="nope").status_code, 412
+        )
+        self.assertEqual(MenuItem.objects.get().title, "Soup")
+
+        self.assertEqual(self.client.delete(path, HTTP_IF_MATCH='"3"').status_code, 204)
+
+    def test_order_writes_check_if_match(self):
+        order = self.create_order(self.customer, 1)
+        path = f"/api/orders/{order.id}"
+        assign = {"username": "delivery_crew1", "quantity": 1}
+
+        self.assertEqual(
+            self.client.put(path, assign, HTTP_IF_MATCH='"1"').status_code, 201
+        )
+        self.assertEqual(
+            self.client.put(path, assign, HTTP_IF_MATCH='"1"').status_code, 412
+        )
+        self.assertEqual(self.client.delete(path, HTTP_IF_MATCH='"1"').status_code, 412)
+        self.assertEqual(self.client.delete(path, HTTP_IF_MATCH='"2"').status_code, 200)
+        self.assertFalse(Order.objects.exists())
+
+
+class OrderStreamTests(LittleLemonTestCase):
+    async def open_stream(self, user):
+        token = await Token.objects.acreate(user=user)
+        # extra keywords are ASGI header names (headers= needs Django 4.2)
+        response = await self.async_client.get(
+            "/api/orders/stream", authorization=f"Token {token.key}"
+        )
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        return response.streaming_content
+
+    async def next_event(self, stream):
+        chunk = await asyncio.wait_for(anext(stream), 1)
+        return chunk.decode() if isinstance(chunk, bytes) else chunk
+
+    async def test_crew_gets_snapshot_then_changes(self):
+        order = await sync_to_async(self.create_order)(self.customer, 1)
+        stream = await self.open_stream(self.crew)
+        try:
+            snapshot = await self.next_event(stream)
+            self.assertTrue(snapshot.startswith("event: snapshot\n"))
+            self.assertIn(f'"id": {order.id}', snapshot)
+
+            await sync_to_async(self.client.force_authenticate)(self.manager)
+            await sync_to_async(self.client.patch)(f"/api/orders/{order.id}")
+            await sync_to_async(process_batch)()
+
+            event = await self.next_event(stream)
+            self.assertIn("event: order.status_changed\n", event)
+            self.assertIn('"status": true', event)
+        finally:
+            await stream.aclose()
+
+    async def test_events_reach_only_the_crews_involved(self):
+        other = await User.objects.acreate(username="delivery_crew2")
+        await sync_to_async(other.groups.add)(self.crew_group)
+        stream = await self.open_stream(other)
+        manager_stream = await self.open_stream(self.manager)
+        try:
+            await self.next_event(stream)
+            await self.next_event(manager_stream)
+            await push_order_events(
+                [
+                    OutboxEvent(
+                        id=1,
+                        topic="order.crew_assigned",
+                        order_id=5,
+                        payload={"delivery_crew": self.crew.id},
+                    ),
+                    OutboxEvent(
+                        id=2,
+                        topic="order.crew_assigned",
+                        order_id=6,
+                        payload={
+                            "delivery_crew": self.crew.id,
+                            "previous_delivery_crew": other.id,
+                        },
+                    ),
+                ]
+            )
+
+            self.assertIn("id: 2\n", await self.next_event(stream))
+            self.assertIn("id: 1\n", await self.next_event(manager_stream))
+            self.assertIn("id: 2\n", await self.next_event(manager_stream))
+        finally:
+            await stream.aclose()
+            await manager_stream.aclose()
+
+    async def test_customers_have_no_stream(self):
+        token = await Token.objects.acreate(user=self.customer)
+        response = await self.async_client.get(
+            "/api/orders/stream", authorization=f"Token {token.key}"
+        )
+        self.assertEqual(response.status_code, 403)
+        response = await self.async_client.get("/api/orders/stream")
+        self.assertEqual(response.status_code, 401)
+
+
+class OrderAssignmentTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.manager)
+        self.other_crew = User.objects.create_user("delivery_crew2")
+        self.other_crew.groups.add(self.crew_group)
+
+    def assign(self, assignments):
+        return self.client.post("/api/orders/assignments", assignments, format="json")
+
+    def test_reports_each_pair(self):
+        first, second, third = [self.create_order(self.customer, 1) for _ in range(3)]
+
+        response = self.assign(
+            [
+                {"order_id": first.id, "username": "delivery_crew2"},
+                {"order_id": second.id, "username": "customer1"},
+                {"order_id": third.id, "username": "nobody"},
+                {"order_id": 999, "username": "delivery_crew2"},
+                {"order_id": first.id, "username": "delivery_crew1"},
+                {"order_id": third.id, "username": "delivery_crew2", "version": 5},
+            ]
+        )
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual(
+            [result["assigned"] for result in results],
+            [True, False, False, False, False, False],
+        )
+        self.assertEqual(results[0]["version"], 2)
+        self.assertIn("not a delivery crew", results[1]["error"])
+        self.assertIn("does not exist", results[2]["error"])
+        self.assertIn("does not exist", results[3]["error"])
+        self.assertIn("listed twice", results[4]["error"])
+        self.assertIn("changed by another request", results[5]["error"])
+        self.assertEqual(
+            dict(Order.objects.values_list("id", "delivery_crew_id")),
+            {
+                first.id: self.other_crew.id,
+                second.id: self.crew.id,
+                third.id: self.crew.id,
+            },
+        )
+
+    def test_records_events(self):
+        order = self.create_order(self.customer, 1)
+
+        self.assign([{"order_id": order.id, "username": "delivery_crew2"}])
+
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.topic, "order.crew_assigned")
+        self.assertEqual(event.payload["delivery_crew"], self.other_crew.id)
+        self.assertEqual(event.payload["previous_delivery_crew"], self.crew.id)
+
+    def test_query_count_is_constant(self):
+        counts = []
+        for size in (1, 20):
+            orders = [self.create_order(self.customer, 0) for _ in range(size)]
+            self.clear_caches()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.assign(
+                    [
+                        {"order_id": order.id, "username": "delivery_crew2"}
+                        for order in orders
+                    ]
+                )
+            self.assertEqual(response.status_code, 200)
+            counts.append(len(queries))
+
+        self.assertEqual(counts[1], counts[0])
+
+    def test_customers_are_forbidden(self):
+        self.client.force_authenticate(self.customer)
+        response = self.assign([])
+
+        self.assertEqual(response.status_code, 403)
+
+
+class CrewBalancerTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other_crew = User.objects.create_user("delivery_crew2")
+        self.other_crew.groups.add(self.crew_group)
+
+    def open_orders(self):
+        return dict(
+            Order.objects.filter(status=False)
+            .values("delivery_crew_id")
+            .annotate(orders=Count("id"))
+            .values_list("delivery_crew_id", "orders")
+        )
+
+    def test_new_orders_go_to_least_loaded_crew(self):
+        self.create_order(self.customer, 0)
+        for _ in range(3):
+            self.fill_cart(self.customer, 1)
+            place_order(self.customer)
+
+        process_batch()
+
+        self.assertEqual(self.open_orders(), {self.crew.id: 2, self.other_crew.id: 2})
+        self.assertEqual(
+            OutboxEvent.objects.filter(
+                topic="order.crew_assigned", processed__isnull=True
+            ).count(),
+            3,
+        )
+
+    def test_loads_follow_events(self):
+        loads = CrewLoads({1: 0, 2: 0, 3: 1})
+        self.assertEqual([loads.pick(), loads.pick()], [1, 2])
+
+        loads.apply(
+            [
+                OutboxEvent(
+                    topic="order.status_changed",
+                    payload={"delivery_crew": 3, "status": True},
+                ),
+                OutboxEvent(
+                    topic="order.crew_assigned",
+                    payload={"delivery_crew": 1, "previous_delivery_crew": 2},
+                ),
+            ]
+        )
+
+        self.assertEqual(loads.loads, {1: 2, 2: 0, 3: 0})
+        self.assertEqual([loads.pick(), loads.pick(), loads.pick()], [2, 3, 2])
+
+    def test_assign_orders_command(self):
+        for _ in range(5):
+            Order.objects.create(user=self.customer, total=0)
+
+        call_command("assign_orders", batch_size=2, stdout=StringIO())
+
+        self.assertEqual(self.open_orders(), {self.crew.id: 3, self.other_crew.id: 2})
+
+
+class OrderArchiveTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.old = self.create_order(self.customer, 2)
+        self.old_open = self.create_order(self.customer, 1)
+        self.recent = self.create_order(self.customer, 1)
+        Order.objects.filter(id__in=[self.old.id, self.recent.id]).update(status=True)
+        Order.objects.filter(id__in=[self.old.id, self.old_open.id]).update(
+            date=date(2020, 1, 1)
+        )
+
+    def archive(self, **options):
+        call_command("archive_orders", days=30, stdout=StringIO(), **options)
+
+    def order_ids(self, url):
+        self.client.force_authenticate(self.manager)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return sorted(order["id"] for order in response.data["results"])
+
+    def test_moves_old_delivered_orders(self):
+        self.archive()
+
+        self.assertEqual(
+            list(ArchivedOrder.objects.values_list("id", flat=True)), [self.old.id]
+        )
+        self.assertEqual(ArchivedOrderItem.objects.filter(order=self.old.id).count(), 2)
+        self.assertFalse(OrderItem.objects.filter(order=self.old.id).exists())
+        self.assertEqual(
+            sorted(Order.objects.values_list("id", flat=True)),
+            [self.old_open.id, self.recent.id],
+        )
+
+    def test_archiving_changes_the_order_validators(self):
+        self.client.force_authenticate(self.manager)
+        etag = self.client.get("/api/orders")["ETag"]
+
+        self.archive()
+
+        response = self.client.get("/api/orders", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_runs_in_resumable_batches(self):
+        other = self.create_order(self.customer, 1)
+        Order.objects.filter(id=other.id).update(status=True, date=date(2020, 1, 2))
+
+        self.archive(batch_size=1, max_batches=1)
+        self.assertEqual(ArchivedOrder.objects.count(), 1)
+        self.archive(batch_size=1)
+        self.assertEqual(ArchivedOrder.objects.count(), 2)
+
+    def test_history_reads_the_archive(self):
+        self.archive()
+
+        self.assertEqual(
+            self.order_ids("/api/orders"), [self.old_open.id, self.recent.id]
+        )
+        self.assertEqual(self.order_ids("/api/orders?history=true"), [self.old.id])
+        response = self.client.get(f"/api/orders/{self.old.id}?history=true")
+        self.assertEqual(len(response.data), 2)
+
+    def test_archived_order_is_gone_without_history(self):
+        self.archive()
+        self.client.force_authenticate(self.manager)
+
+        response = self.client.get(f"/api/orders/{self.old.id}")
+        self.assertEqual(response.status_code, 404)
+        response = self.client.delete(f"/api/orders/{self.old.id}")
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(ArchivedOrder.objects.filter(id=self.old.id).exists())
+
+    def test_rollups_include_archived_orders(self):
+        self.archive()
+        call_command("rebuild_rollups", stdout=StringIO())
+
+        self.assertEqual(
+            DailyMenuItemSales.objects.filter(date=date(2020, 1, 1)).count(), 3
+        )
+
+
+class MetricsTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        registry.reset()
+
+    def server_timing(self, response):
+        return dict(
+            entry.split(";")[0:2] for entry in response["Server-Timing"].split(", ")
+        )
+
+    def test_server_timing(self):
+        self.create_menu_items(3)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/menu-items")
+
+        timing = self.server_timing(response)
+        self.assertIn(f'desc="{len(queries)} queries"', response["Server-Timing"])
+        for name in ("db", "permissions", "throttles", "serialize", "render", "total"):
+            self.assertIn(name, timing)
+
+    def test_counters_by_view(self):
+        self.client.force_authenticate(self.customer)
+        self.client.get("/api/orders")
+        self.client.get("/api/orders")
+        admin = User.objects.create_superuser("admin", password="littlelemon")
+        self.client.force_authenticate(admin)
+
+        response = self.client.get("/api/metrics")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'littlelemon_requests_total{view="OrdersView",method="GET",status="200"} 2',
+            response.content.decode(),
+        )
+        self.assertIn(
+            'littlelemon_request_duration_seconds_count{view="OrdersView"} 2',
+            response.content.decode(),
+        )
+
+    def test_streamed_export_is_measured_to_the_end(self):
+        self.create_order(self.customer, 2)
+        self.client.force_authenticate(self.manager)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/orders/export")
+            body = b"".join(response.streaming_content)
+
+        self.assertNotIn("Server-Timing", response)
+        metrics = registry.render()
+        self.assertIn(
+            f'littlelemon_db_queries_total{{view="OrderExportView"}} {len(queries)}',
+            metrics,
+        )
+        self.assertIn(
+            f'littlelemon_response_bytes_total{{view="OrderExportView"}} {len(body)}',
+            metrics,
+        )
+
+    def test_metrics_admin_only(self):
+        self.client.force_authenticate(self.manager)
+        self.assertEqual(self.client.get("/api/metrics").status_code, 403)
+
+    @override_settings(LITTLELEMON_METRICS_SAMPLE_RATE=0)
+    def test_unsampled_requests(self):
+        response = self.client.get("/api/menu-items")
+
+        self.assertNotIn("Server-Timing", response)
+        self.assertEqual(registry.render(), "\n")
+
+
+@override_settings(LITTLELEMON_READ_REPLICAS=["test_replica"])
+class ReplicaRoutingTests(LittleLemonTestCase):
+    """The primary is the test database, the replica a separate SQLite file."""
+
+    @classmethod
+    def setUpClass(cls):
+        # the alias only exists while the class runs, so the test runner
+        # doesn't try to create a test database for it
+        cls.directory = tempfile.TemporaryDirectory()
+        connections.settings["test_replica"] = {
+            **connections.settings["default"],
+            "NAME": f"{cls.directory.name}/replica.sqlite3",
+        }
+        call_command("migrate", database="test_replica", verbosity=0)
+        cls.databases = {"default", "test_replica"}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections["test_replica"].close()
+        del connections["test_replica"]
+        del connections.settings["test_replica"]
+        cls.directory.cleanup()
+
+    def setUp(self):
+        super().setUp()
+        # replicate what authentication needs, then let the two diverge
+        self.tokens = {
+            user: Token.objects.create(user=user).key
+            for user in (self.customer, self.manager)
+        }
+        for model in (Group, User, User.groups.through, Token, Category):
+            model.objects.using("test_replica").bulk_create(model.objects.all())
+        Category.objects.using("test_replica").create(slug="replica", title="Replica")
+        self.menuitem = self.create_menu_items(1)[0]
+        MenuItem.objects.using("test_replica").bulk_create([self.menuitem])
+
+    def get(self, user, url):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.tokens[user]}")
+        return self.client.get(url)
+
+    def test_reads_go_to_replica(self):
+        response = self.get(self.customer, "/api/category")
+
+        self.assertEqual(
+            [category["title"] for category in response.data["results"]],
+            ["Mains", "Replica"],
+        )
+
+    def test_writer_reads_own_writes(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Token {self.tokens[self.customer]}"
+        )
+        response = self.client.post(
+            "/api/cart/menu-items",
+            [{"menuitem_id": self.menuitem.id, "quantity": 2}],
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+
+        # other clients still read the replica
+        self.assertEqual(self.get(self.manager, "/api/category").data["count"], 2)
+        # the writer is pinned to the primary
+        self.assertEqual(
+            self.get(self.customer, "/api/cart/menu-items").data["count"], 1
+        )
+        self.assertEqual(self.get(self.customer, "/api/category").data["count"], 1)
+
+    @override_settings(LITTLELEMON_SHARED_CACHE=False)
+    def test_reads_stay_on_primary_without_shared_cache(self):
+        response = self.get(self.customer, "/api/category")
+
+        self.assertEqual(
+            [category["title"] for category in response.data["results"]], ["Mains"]
+        )
+
+    def test_export_streams_from_replica(self):
+        replicated = self.create_order(self.customer, 2)
+        for model in (MenuItem, Order, OrderItem):
+            model.objects.using("test_replica").bulk_create(
+                model.objects.exclude(pk=self.menuitem.pk)
+                if model is MenuItem
+                else model.objects.all()
+            )
+        self.create_order(self.customer, 1)
+
+        response = self.get(self.manager, "/api/orders/export")
+        rows = list(csv.reader(StringIO(b"".join(response.streaming_content).decode())))
+
+        self.assertEqual([row[0] for row in rows[1:]], [str(replicated.id)] * 2)
+
+    def test_no_validators_while_replica_may_lag(self):
+        response = self.get(self.customer, "/api/category")
+        self.assertNotIn("ETag", response)
+
+        with override_settings(LITTLELEMON_REPLICA_LAG=0):
+            response = self.get(self.customer, "/api/category")
+        self.assertIn("ETag", response)
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def test_output_matches_json_renderer(self):
+        data = {
+            "results": [
+                {
+                    "id": 1,
+                    "title": "Lemon \u2028 Tart \u00e9",
+                    "price": Decimal("5.25"),
+                    "date": date(2023, 1, 2),
+                    "created": datetime(2023, 1, 2, 3, 4, 5, 678901, timezone.utc),
+                    "featured": True,
+                    "delivery_crew": None,
+                }
+            ],
+            7: "int key",
+        }
+
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_indented_output(self):
+        data = {"id": 1}
+        media_type = "application/json; indent=2"
+
+        self.assertEqual(
+            FastJSONRenderer().render(data, media_type),
+            JSONRenderer().render(data, media_type),
+        )
+
+
+class LoadTestBudgetTests(SimpleTestCase):
+    results = {
+        "orders:list": {"p50_ms": 5, "p95_ms": 9, "p99_ms": 30, "queries": 3},
+        "menu-items:list": {"p50_ms": 2, "p95_ms": 4, "p99_ms": 6, "queries": 1},
+    }
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(
+            [percentile(values, p) for p in (50, 95, 99, 100)], [50, 95, 99, 100]
+        )
+        self.assertEqual(percentile([7], 99), 7)
+
+    def test_throughput_per_endpoint(self):
+        samples = {
+            "orders:list": [(4.0, 3, True)] * 30,
+            "category:list": [(1.0, 1, True)],
+        }
+
+        results = LoadTestCommand().summarize(samples, elapsed=2)
+
+        self.assertEqual(results["orders:list"]["requests_per_s"], 15)
+        self.assertEqual(results["category:list"]["requests_per_s"], 0.5)
+
+    def test_budget_violations(self):
+        budget = {"*": {"p99_ms": 20}, "menu-items:list": {"queries": 0}}
+
+        self.assertEqual(
+            LoadTestCommand().check_budget(self.results, budget),
+            ["orders:list: p99_ms 30 > 20", "menu-items:list: queries 1 > 0"],
+        )
+        self.assertEqual(
+            LoadTestCommand().check_budget(self.results, {"*": {"p99_ms": 30}}), []
+        )
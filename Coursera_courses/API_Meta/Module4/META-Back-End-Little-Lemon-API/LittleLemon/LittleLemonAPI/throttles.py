@@ -0,0 +1,146 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+STATS_KEY = "littlelemon:throttle:stats:{}:{}"
+
+
+def get_throttle_cache():
+    return caches[getattr(settings, "LITTLELEMON_THROTTLE_CACHE", "default")]
+
+
+def increment(cache, key, timeout):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout):
+            return 1
+        return cache.incr(key)
+
+
+def throttle_stats(scopes=None):
+    """Return {scope: {"hit": n, "deny": n}} for the throttle scopes."""
+    scopes = scopes or list(api_settings.DEFAULT_THROTTLE_RATES)
+    keys = [
+        STATS_KEY.format(scope, kind) for scope in scopes for kind in ("hit", "deny")
+    ]
+    counts = get_throttle_cache().get_many(keys)
+    return {
+        scope: {
+            kind: counts.get(STATS_KEY.format(scope, kind), 0)
+            for kind in ("hit", "deny")
+        }
+        for scope in scopes
+    }
+
+
+class SlidingWindowRateThrottle(SimpleRateThrottle):
+    """
+    Rate throttle with a sliding-window counter per key.
+
+    Each key keeps one counter per fixed window in the throttle cache. The
+    request rate is estimated as the current window's count plus the
+    previous window's count weighted by how much of it is still inside the
+    sliding window. That is one read per check, and one increment per
+    allowed request, whatever the rate, instead of reading and writing a
+    list of timestamps. Denied requests aren't counted, so a client that
+    keeps retrying gets back under the limit like one that waits.
+    Point LITTLELEMON_THROTTLE_CACHE at a shared cache (Redis) so all
+    worker processes count against the same limit.
+    """
+
+    def __init__(self):
+        # resolved on every request, so the cache and rates follow the settings
+        self.cache = get_throttle_cache()
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+
+    def get_rate(self):
+        try:
+            return api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+        except KeyError:
+            raise ImproperlyConfigured(
+                f"No default throttle rate set for '{self.scope}' scope"
+            )
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window, elapsed = divmod(self.now, self.duration)
+        current_key = f"{self.key}:{int(window)}"
+        previous_key = f"{self.key}:{int(window) - 1}"
+        counts = self.cache.get_many([current_key, previous_key])
+
+        # this request included
+        self.estimate = (
+            counts.get(previous_key, 0) * (1 - elapsed / self.duration)
+            + counts.get(current_key, 0)
+            + 1
+        )
+        self.window_left = self.duration - elapsed
+
+        if self.estimate > self.num_requests:
+            self.record("deny")
+            return False
+        increment(self.cache, current_key, self.duration * 2)
+        self.record("hit")
+        return True
+
+    def record(self, kind):
+        increment(self.cache, STATS_KEY.format(self.scope, kind), None)
+
+    def wait(self):
+        # by the end of this window the current count becomes the weighted one
+        return self.window_left
+
+
+class AnonSlidingWindowThrottle(SlidingWindowRateThrottle):
+    scope = "anon"
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return None
+        return self.cache_format % {
+            "scope": self.scope,
+            "ident": self.get_ident(request),
+        }
+
+
+class UserSlidingWindowThrottle(SlidingWindowRateThrottle):
+    scope = "user"
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+
+class ScopedMethodThrottle(UserSlidingWindowThrottle):
+    """Throttle only the listed methods of a view under their own scope."""
+
+    methods = []
+
+    def allow_request(self, request, view):
+        if request.method not in self.methods:
+            return True
+        return super().allow_request(request, view)
+
+
+class CheckoutRateThrottle(ScopedMethodThrottle):
+    scope = "checkout"
+    methods = ["POST"]
+
+
+class MenuReadRateThrottle(ScopedMethodThrottle):
+    scope = "menu"
+    methods = ["GET", "HEAD"]
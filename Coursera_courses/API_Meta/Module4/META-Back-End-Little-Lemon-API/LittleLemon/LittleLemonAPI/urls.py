@@ -15,7 +15,16 @@ urlpatterns = [
     path("groups/delivery-crew/users", views.DeliveryCrewPostView.as_view(),name="delivery-crew"),
     path("groups/delivery-crew/users/<int:pk>", views.DeliveryCrewDeleteView.as_view(), name="delivery-crew-detail"),
     path("cart/menu-items", views.CartView.as_view(), name="cart"),
+    path("cart/menu-items/bulk", views.CartBulkView.as_view(), name="cart-bulk"),
     path("cart/menu-items/<int:pk>", views.CartItemView.as_view(), name="cart-detail"),
     path("orders", views.OrdersView.as_view(), name="orders"),
     path("orders/<int:pk>", views.OrderItemView.as_view(), name="orders-detail"),
+    path("orders/assignments", views.OrderAssignmentView.as_view(), name="orders-assignments"),
+    path("orders/export", views.OrderExportView.as_view(), name="orders-export"),
+    path("orders/stream", views.OrderStreamView.as_view(), name="orders-stream"),
+    path("throttles", views.ThrottleStatsView.as_view(), name="throttles"),
+    path("metrics", views.MetricsView.as_view(), name="metrics"),
+    path("reports/menu-items", views.MenuItemSalesView.as_view(), name="report-menu-items"),
+    path("reports/categories", views.CategorySalesView.as_view(), name="report-categories"),
+    path("reports/delivery-crew", views.CrewSalesView.as_view(), name="report-delivery-crew"),
 ]
@@ -1,22 +1,47 @@
+from asgiref.sync import sync_to_async
+from django.db import router, transaction
+from django.db.models import Sum
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.views import View
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import generics, status
 from rest_framework import viewsets
+from rest_framework.exceptions import APIException
 from rest_framework.response import Response
 from rest_framework.filters import OrderingFilter, SearchFilter
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
-from rest_framework.throttling import UserRateThrottle, AnonRateThrottle
-from datetime import date
 
 from django.contrib.auth.models import User, Group
-from .models import Category, MenuItem, Cart, Order, OrderItem
+from .models import (
+    Category,
+    MenuItem,
+    Cart,
+    Order,
+    OrderItem,
+    ArchivedOrder,
+    ArchivedOrderItem,
+    DailyCategorySales,
+    DailyCrewSales,
+    DailyMenuItemSales,
+)
 from .serializers import (
     CategorySerializer,
     MenuItemSerializer,
     CartSerializer,
+    CartLineSerializer,
+    CartAddLineSerializer,
     OrderSerializer,
     OrderItemSerializer,
     UserSerializer,
+    CategoryReadSerializer,
+    MenuItemReadSerializer,
+    OrderReadSerializer,
+    CrewAssignmentSerializer,
+    DateRangeSerializer,
+    MenuItemSalesSerializer,
+    CategorySalesSerializer,
+    CrewSalesSerializer,
 )
 from .permissions import (
     IsAdmin,
@@ -26,19 +51,68 @@ from .permissions import (
     IsCustomerAndOwner,
     IsDeliveryCrewAndOwner,
     ReadOnly,
+    invalidate_user_roles,
+)
+from .throttles import (
+    AnonSlidingWindowThrottle,
+    UserSlidingWindowThrottle,
+    CheckoutRateThrottle,
+    MenuReadRateThrottle,
+    throttle_stats,
+)
+from .paginations import (
+    MenuItemListPagination,
+    OrderListPagination,
+    OrderItemListPagination,
 )
-from .paginations import MenuItemListPagination
+from .archive import wants_history
+from .assignments import assign_crews
+from .caches import touch_table
+from .checkout import place_order
+from .concurrency import claim_version, if_match_versions, toggle
+from .dispatch import order_stream, stream_subscriber
+from .exports import EXPORT_FORMATS, export_rows
+from .carts import update_cart
+from .events import (
+    publish,
+    ORDER_CREW_ASSIGNED,
+    ORDER_STATUS_CHANGED,
+    ORDER_DELETED,
+)
+from .metrics import registry
+from .mixins import (
+    CatalogCacheMixin,
+    ConditionalGetMixin,
+    IfMatchMixin,
+    MetricsMixin,
+    ValuesReadMixin,
+)
+from .search import FullTextSearchFilter
 
 
 # Create your views here.
-class CategoryViewSet(viewsets.ModelViewSet):
-    throttle_classes = [AnonRateThrottle, UserRateThrottle]
+class CategoryViewSet(
+    MetricsMixin,
+    ConditionalGetMixin,
+    CatalogCacheMixin,
+    ValuesReadMixin,
+    viewsets.ModelViewSet,
+):
+    throttle_classes = [
+        AnonSlidingWindowThrottle,
+        UserSlidingWindowThrottle,
+        MenuReadRateThrottle,
+    ]
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    read_serializer_class = CategoryReadSerializer
     filter_backends = [DjangoFilterBackend, OrderingFilter, SearchFilter]
     filterset_fields = ["title"]
     ordering_fields = ["id", "title"]
     search_fields = ["title"]
+    cache_models = [Category]
+    conditional_models = [Category]
+    conditional_per_user = False
 
     def get_permissions(self):
         if self.request.method == "GET":
@@ -48,15 +122,30 @@ class CategoryViewSet(viewsets.ModelViewSet):
         return [permission() for permission in permission_classes]
 
 
-class MenuItemViewSet(viewsets.ModelViewSet):
-    throttle_classes = [AnonRateThrottle, UserRateThrottle]
-    queryset = MenuItem.objects.all()
+class MenuItemViewSet(
+    MetricsMixin,
+    ConditionalGetMixin,
+    CatalogCacheMixin,
+    ValuesReadMixin,
+    IfMatchMixin,
+    viewsets.ModelViewSet,
+):
+    throttle_classes = [
+        AnonSlidingWindowThrottle,
+        UserSlidingWindowThrottle,
+        MenuReadRateThrottle,
+    ]
+    queryset = MenuItem.objects.select_related("category")
     serializer_class = MenuItemSerializer
-    filter_backends = [DjangoFilterBackend, OrderingFilter, SearchFilter]
+    read_serializer_class = MenuItemReadSerializer
+    filter_backends = [DjangoFilterBackend, OrderingFilter, FullTextSearchFilter]
     filterset_fields = ["title", "price", "featured", "category"]
     ordering_fields = ["id", "title", "price"]
     search_fields = ["title", "category__title"]
     pagination_class = MenuItemListPagination
+    cache_models = [MenuItem, Category]
+    conditional_models = [MenuItem, Category]
+    conditional_per_user = False
 
     def get_permissions(self):
         if self.request.method == "GET":
@@ -66,37 +155,54 @@ class MenuItemViewSet(viewsets.ModelViewSet):
 
         return [permission() for permission in permission_classes]
 
-    # Change featured for menu-item
+    # Change featured for menu-item, in one UPDATE
     def partial_update(self, request, *args, **kwargs):
-        menuitem = MenuItem.objects.get(pk=self.kwargs["pk"])
-        menuitem.featured = not menuitem.featured
-        menuitem.save()
+        menuitem = toggle(
+            MenuItem,
+            self.kwargs["pk"],
+            "featured",
+            if_match_versions(request),
+            returning=["title"],
+        )
+        touch_table(MenuItem)
 
         return Response(
             {
-                "message": f"Featured status of {str(menuitem.title)} was changed to {str(menuitem.featured)}"
+                "message": f"Featured status of {str(menuitem.title)} was changed to {str(menuitem.featured)}",
+                "version": menuitem.version,
             },
             status=status.HTTP_200_OK,
         )
 
 
-class CartView(generics.ListCreateAPIView, generics.DestroyAPIView):
-    throttle_classes = [AnonRateThrottle, UserRateThrottle]
+class CartView(
+    MetricsMixin,
+    ConditionalGetMixin,
+    generics.ListCreateAPIView,
+    generics.DestroyAPIView,
+):
+    throttle_classes = [AnonSlidingWindowThrottle, UserSlidingWindowThrottle]
     serializer_class = CartSerializer
     permission_classes = [IsAuthenticated]
+    conditional_models = [Cart, MenuItem, Category]
 
     def get_queryset(self):
-        return Cart.objects.filter(user=self.request.user)
+        # user and menuitem (with its category) are read by CartSerializer
+        return Cart.objects.filter(user=self.request.user).select_related(
+            "user", "menuitem__category"
+        )
 
     def post(self, request, *args, **kwargs):
-        serialized_item = self.get_serializer(data=request.data, many=True)
+        serialized_items = CartAddLineSerializer(data=request.data, many=True)
         # .is_valid() - Deserializes and validates incoming data
-        serialized_item.is_valid(raise_exception=True)
-        serialized_item.save(user=self.request.user)
+        serialized_items.is_valid(raise_exception=True)
+        # a menu item that is already in the cart gets the new quantity
+        updated, removed = update_cart(request.user, serialized_items.validated_data)
+        titles = ", ".join(serialized_items.menuitems[pk] for pk in updated)
 
         return Response(
             {
-                "message": f"{serialized_item.data['menuitem']} was successfully added to the cart for {request.user.username}"
+                "message": f"{titles} was successfully added to the cart for {request.user.username}"
             },
             status=status.HTTP_201_CREATED,
         )
@@ -110,12 +216,36 @@ class CartView(generics.ListCreateAPIView, generics.DestroyAPIView):
         )
 
 
-class CartItemView(generics.RetrieveUpdateDestroyAPIView):
+class CartBulkView(MetricsMixin, generics.GenericAPIView):
+    throttle_classes = [AnonSlidingWindowThrottle, UserSlidingWindowThrottle]
+    serializer_class = CartLineSerializer
+    permission_classes = [IsAuthenticated]
+
+    # Add, update (quantity > 0) and remove (quantity = 0) many cart lines
+    def post(self, request, *args, **kwargs):
+        serialized_lines = self.get_serializer(data=request.data, many=True)
+        serialized_lines.is_valid(raise_exception=True)
+        updated, removed = update_cart(request.user, serialized_lines.validated_data)
+
+        return Response(
+            {
+                "message": f"Cart was successfully updated for {request.user.username}",
+                "updated": updated,
+                "removed": removed,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class CartItemView(MetricsMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = CartSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Cart.objects.filter(user=self.request.user)
+        # user and menuitem (with its category) are read by CartSerializer
+        return Cart.objects.filter(user=self.request.user).select_related(
+            "user", "menuitem__category"
+        )
     
     def get_object(self):
         queryset = self.filter_queryset(self.get_queryset())
@@ -127,45 +257,41 @@ class CartItemView(generics.RetrieveUpdateDestroyAPIView):
         return obj
 
 
-class OrdersView(generics.ListCreateAPIView):
+class OrdersView(
+    MetricsMixin, ConditionalGetMixin, ValuesReadMixin, generics.ListCreateAPIView
+):
+    throttle_classes = [
+        AnonSlidingWindowThrottle,
+        UserSlidingWindowThrottle,
+        CheckoutRateThrottle,
+    ]
     serializer_class = OrderSerializer
+    read_serializer_class = OrderReadSerializer
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_fields = ["status", "date", "delivery_crew"]
     ordering_fields = ["id", "delivery_crew", "total", "date"]
     permission_classes = [IsAuthenticated]
+    # fields get_queryset() filters on, for the index_advisor command
+    scope_fields = ["user", "delivery_crew"]
+    pagination_class = OrderListPagination
+    conditional_models = [Order]
 
     def get_queryset(self):
+        # delivered orders moved to the archive are only read on request
+        orders = ArchivedOrder.objects if wants_history(self.request) else Order.objects
         if IsManager().has_permission(self.request, self) or IsAdmin().has_permission(
             self.request, self
         ):
-            return Order.objects.all()
+            return orders.all()
         elif IsDeliveryCrew().has_permission(self.request, self):
-            return Order.objects.filter(delivery_crew=self.request.user)
+            return orders.filter(delivery_crew=self.request.user)
         else:
-            return Order.objects.filter(user=self.request.user)
+            return orders.filter(user=self.request.user)
 
     def post(self, request, *args, **kwargs):
-        cart = Cart.objects.filter(user=request.user)
-
-        if cart.exists():
-            total = 0
-
-            order = Order.objects.create(
-                user=request.user, status=False, total=total, date=date.today
-            )
-
-            for cart_item in cart.values():
-                menuitem = get_object_or_404(MenuItem, id=cart_item["menuitem_id"])
-                order_item = OrderItem.objects.create(
-                    order=order, menuitem=menuitem, quantity=cart_item["quantity"]
-                )
-                order_item.save()
-                total += float(menuitem.price) * cart_item["quantity"]
-
-            order.total = total
-            order.save()
-            cart.delete()
+        order = place_order(request.user)
 
+        if order is not None:
             return Response(
                 {
                     "message": f"Order {order.id} for {request.user.username} was successfully added"
@@ -179,9 +305,16 @@ class OrdersView(generics.ListCreateAPIView):
         )
 
 
-class OrderItemView(generics.ListAPIView, generics.RetrieveUpdateDestroyAPIView):
-    throttle_classes = [AnonRateThrottle, UserRateThrottle]
+class OrderItemView(
+    MetricsMixin,
+    ConditionalGetMixin,
+    generics.ListAPIView,
+    generics.RetrieveUpdateDestroyAPIView,
+):
+    throttle_classes = [AnonSlidingWindowThrottle, UserSlidingWindowThrottle]
     serializer_class = OrderItemSerializer
+    pagination_class = OrderItemListPagination
+    conditional_models = [Order, OrderItem, MenuItem, Category]
     filter_backends = [DjangoFilterBackend, OrderingFilter, SearchFilter]
     filterset_fields = ["menuitem", "order__status", "order__delivery_crew"]
     ordering_fields = [
@@ -192,6 +325,7 @@ class OrderItemView(generics.ListAPIView, generics.RetrieveUpdateDestroyAPIView)
         "order__delivery_crew",
     ]
     search_fields = ["menuitem", "order__status", "order__delivery_crew"]
+    scope_fields = ["order"]
 
     def get_permissions(self):
         if self.request.method in ["PUT", "DELETE"]:
@@ -203,35 +337,54 @@ class OrderItemView(generics.ListAPIView, generics.RetrieveUpdateDestroyAPIView)
         return [permission() for permission in permission_classes]
 
     def get_queryset(self):
-        return OrderItem.objects.filter(order_id=self.kwargs["pk"])
+        lines = ArchivedOrderItem if wants_history(self.request) else OrderItem
+        # menuitem (with its category) and order are read by OrderItemSerializer
+        return lines.objects.filter(order_id=self.kwargs["pk"]).select_related(
+            "menuitem__category", "order__delivery_crew"
+        )
 
     def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
-        serialized_items = self.get_serializer(queryset, many=True)
-        order = Order.objects.get(pk=self.kwargs["pk"])
-
-        if IsDeliveryCrewAndOwner().has_object_permission(
-            self.request, self, order
-        ) or IsCustomerAndOwner().has_object_permission(self.request, self, order):
-            return Response(serialized_items.data, status=status.HTTP_200_OK)
-        elif IsManager().has_permission(self.request, self) or IsAdmin().has_permission(
-            self.request, self
+        orders = ArchivedOrder if wants_history(request) else Order
+        order = get_object_or_404(orders, pk=self.kwargs["pk"])
+
+        if not (
+            IsDeliveryCrewAndOwner().has_object_permission(self.request, self, order)
+            or IsCustomerAndOwner().has_object_permission(self.request, self, order)
+            or IsManager().has_permission(self.request, self)
+            or IsAdmin().has_permission(self.request, self)
         ):
-            return Response(serialized_items.data, status=status.HTTP_200_OK)
-        else:
             return Response(
                 {"message": "You do not have permission to see this page!"},
                 status.HTTP_403_FORBIDDEN,
             )
 
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+
+        if page is not None:
+            serialized_items = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serialized_items.data)
+
+        serialized_items = self.get_serializer(queryset, many=True)
+        return Response(serialized_items.data, status=status.HTTP_200_OK)
+
     def partial_update(self, request, *args, **kwargs):
-        order = Order.objects.get(pk=self.kwargs["pk"])
-        order.status = not order.status
-        order.save()
+        with transaction.atomic():
+            # one UPDATE, so concurrent toggles can't undo each other
+            order = toggle(
+                Order,
+                self.kwargs["pk"],
+                "status",
+                if_match_versions(request),
+                returning=["user", "delivery_crew", "date"],
+            )
+            touch_table(Order)
+            publish(ORDER_STATUS_CHANGED, order)
 
         return Response(
             {
-                "message": f"Status of order # {str(order.id)} was changed to {str(order.status)}"
+                "message": f"Status of order # {str(order.id)} was changed to {str(order.status)}",
+                "version": order.version,
             },
             status=status.HTTP_200_OK,
         )
@@ -241,20 +394,30 @@ class OrderItemView(generics.ListAPIView, generics.RetrieveUpdateDestroyAPIView)
         serialized_order.is_valid(raise_exception=True)
         order = get_object_or_404(Order, pk=self.kwargs["pk"])
         crew = get_object_or_404(User, username=request.data["username"])
-        order.delivery_crew = crew
-        order.save()
+
+        with transaction.atomic():
+            claim_version(order, if_match_versions(request))
+            previous_crew = order.delivery_crew_id
+            order.delivery_crew = crew
+            order.save(update_fields=["delivery_crew", "version"])
+            publish(ORDER_CREW_ASSIGNED, order, previous_delivery_crew=previous_crew)
 
         return Response(
             {
-                "message": f"{str(crew.username)} was assigned to order # {str(order.id)}"
+                "message": f"{str(crew.username)} was assigned to order # {str(order.id)}",
+                "version": order.version,
             },
             status=status.HTTP_201_CREATED,
         )
 
     def delete(self, request, *args, **kwargs):
-        order = Order.objects.get(pk=self.kwargs["pk"])
+        order = get_object_or_404(Order, pk=self.kwargs["pk"])
         order_number = str(order.id)
-        order.delete()
+
+        with transaction.atomic():
+            claim_version(order, if_match_versions(request))
+            publish(ORDER_DELETED, order)
+            order.delete()
 
         return Response(
             {
@@ -264,8 +427,8 @@ class OrderItemView(generics.ListAPIView, generics.RetrieveUpdateDestroyAPIView)
         )
 
 
-class ManagerPostView(generics.ListCreateAPIView):
-    throttle_classes = [AnonRateThrottle, UserRateThrottle]
+class ManagerPostView(MetricsMixin, generics.ListCreateAPIView):
+    throttle_classes = [AnonSlidingWindowThrottle, UserSlidingWindowThrottle]
     queryset = User.objects.filter(groups__name="Manager")
     serializer_class = UserSerializer
     permission_classes = [IsAdmin]
@@ -286,6 +449,7 @@ class ManagerPostView(generics.ListCreateAPIView):
                 user.save()
 
             managers.user_set.add(user)
+            invalidate_user_roles(user.pk)
 
             return Response(
                 {"message": f"{username} was successfully added to 'Manager' group"},
@@ -297,8 +461,8 @@ class ManagerPostView(generics.ListCreateAPIView):
         )
 
 
-class ManagerDeleteView(generics.RetrieveDestroyAPIView):
-    throttle_classes = [AnonRateThrottle, UserRateThrottle]
+class ManagerDeleteView(MetricsMixin, generics.RetrieveDestroyAPIView):
+    throttle_classes = [AnonSlidingWindowThrottle, UserSlidingWindowThrottle]
     queryset = User.objects.filter(groups__name="Manager")
     serializer_class = UserSerializer
     permission_classes = [IsAdmin]
@@ -307,6 +471,7 @@ class ManagerDeleteView(generics.RetrieveDestroyAPIView):
         user = get_object_or_404(User, pk=kwargs["pk"])
         managers = Group.objects.get(name="Manager")
         managers.user_set.remove(user)
+        invalidate_user_roles(user.pk)
         if user.groups.count() == 0 and user.is_staff == True:
             # remove status = Staff and save changes
             user.is_staff = False
@@ -318,8 +483,8 @@ class ManagerDeleteView(generics.RetrieveDestroyAPIView):
         )
 
 
-class DeliveryCrewPostView(generics.ListCreateAPIView):
-    throttle_classes = [AnonRateThrottle, UserRateThrottle]
+class DeliveryCrewPostView(MetricsMixin, generics.ListCreateAPIView):
+    throttle_classes = [AnonSlidingWindowThrottle, UserSlidingWindowThrottle]
     queryset = User.objects.filter(groups__name="Delivery Crew")
     serializer_class = UserSerializer
     permission_classes = [IsManager | IsAdmin]
@@ -340,6 +505,7 @@ class DeliveryCrewPostView(generics.ListCreateAPIView):
                 user.save()
 
             delivery_crews.user_set.add(user)
+            invalidate_user_roles(user.pk)
 
             return Response(
                 {
@@ -354,8 +520,8 @@ class DeliveryCrewPostView(generics.ListCreateAPIView):
         )
 
 
-class DeliveryCrewDeleteView(generics.RetrieveDestroyAPIView):
-    throttle_classes = [AnonRateThrottle, UserRateThrottle]
+class DeliveryCrewDeleteView(MetricsMixin, generics.RetrieveDestroyAPIView):
+    throttle_classes = [AnonSlidingWindowThrottle, UserSlidingWindowThrottle]
     queryset = User.objects.filter(groups__name="Delivery Crew")
     serializer_class = UserSerializer
     permission_classes = [IsManager | IsAdmin]
@@ -364,6 +530,7 @@ class DeliveryCrewDeleteView(generics.RetrieveDestroyAPIView):
         user = get_object_or_404(User, pk=kwargs["pk"])
         delivery_crews = Group.objects.get(name="Delivery Crew")
         delivery_crews.user_set.remove(user)
+        invalidate_user_roles(user.pk)
         if user.groups.count() == 0 and user.is_staff == True:
             # remove status = Staff and save changes
             user.is_staff = False
@@ -375,3 +542,160 @@ class DeliveryCrewDeleteView(generics.RetrieveDestroyAPIView):
             },
             status=status.HTTP_200_OK,
         )
+
+
+class ThrottleStatsView(generics.GenericAPIView):
+    permission_classes = [IsAdmin]
+
+    def get(self, request, *args, **kwargs):
+        return Response(throttle_stats(), status=status.HTTP_200_OK)
+
+
+class MetricsView(generics.GenericAPIView):
+    permission_classes = [IsAdmin]
+
+    # Prometheus scrape target
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(
+            registry.render(), content_type="text/plain; version=0.0.4"
+        )
+
+
+def filter_date_range(request, queryset):
+    dates = DateRangeSerializer(data=request.query_params)
+    dates.is_valid(raise_exception=True)
+    if "start" in dates.validated_data:
+        queryset = queryset.filter(date__gte=dates.validated_data["start"])
+    if "end" in dates.validated_data:
+        queryset = queryset.filter(date__lte=dates.validated_data["end"])
+    return queryset
+
+
+class SalesReportView(MetricsMixin, generics.ListAPIView):
+    """
+    Orders, quantity and revenue per `group_fields` between ?start= and
+    ?end=, summed from the daily rollup tables instead of the orders.
+    """
+
+    permission_classes = [IsAuthenticated, IsManager | IsAdmin]
+    filter_backends = [OrderingFilter]
+    ordering_fields = ["orders", "quantity", "revenue"]
+    rollup_model = None
+    group_fields = []
+    totals = ["orders", "quantity", "revenue"]
+
+    def get_queryset(self):
+        queryset = filter_date_range(self.request, self.rollup_model.objects.all())
+        return (
+            queryset.values(*self.group_fields)
+            .annotate(**{total: Sum(total) for total in self.totals})
+            .order_by("-revenue", self.group_fields[0])
+        )
+
+
+class MenuItemSalesView(SalesReportView):
+    serializer_class = MenuItemSalesSerializer
+    rollup_model = DailyMenuItemSales
+    group_fields = ["menuitem_id", "menuitem__title"]
+
+
+class CategorySalesView(SalesReportView):
+    serializer_class = CategorySalesSerializer
+    rollup_model = DailyCategorySales
+    group_fields = ["category_id", "category__title"]
+
+
+class CrewSalesView(SalesReportView):
+    serializer_class = CrewSalesSerializer
+    rollup_model = DailyCrewSales
+    group_fields = ["delivery_crew_id", "delivery_crew__username"]
+    ordering_fields = ["orders", "delivered", "quantity", "revenue"]
+    totals = ["orders", "delivered", "quantity", "revenue"]
+
+
+class OrderAssignmentView(MetricsMixin, generics.GenericAPIView):
+    """
+    Assign delivery crews to many orders at once: a list of {"order_id",
+    "username"} pairs, each with an optional "version". Each pair succeeds
+    or fails on its own, and the response reports every one of them.
+    """
+
+    serializer_class = CrewAssignmentSerializer
+    permission_classes = [IsAuthenticated, IsManager | IsAdmin]
+    max_assignments = 1000
+
+    def post(self, request, *args, **kwargs):
+        serialized_assignments = self.get_serializer(
+            data=request.data, many=True, max_length=self.max_assignments
+        )
+        serialized_assignments.is_valid(raise_exception=True)
+        results = assign_crews(serialized_assignments.validated_data)
+        assigned = sum(result["assigned"] for result in results)
+
+        return Response(
+            {
+                "message": f"{assigned} of {len(results)} orders were assigned",
+                "results": results,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class OrderExportView(MetricsMixin, generics.GenericAPIView):
+    """
+    Every line of the orders matching the OrdersView filters and ?start=
+    and ?end=, streamed as CSV, or as one JSON object per line with
+    ?output=ndjson, from the archive with ?history=true. Memory use doesn't
+    grow with the export.
+    """
+
+    permission_classes = [IsAuthenticated, IsManager | IsAdmin]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = OrdersView.filterset_fields
+
+    def get_queryset(self):
+        if wants_history(self.request):
+            return ArchivedOrder.objects.all()
+        return Order.objects.all()
+
+    def get(self, request, *args, **kwargs):
+        output = request.query_params.get("output", "csv")
+        if output not in EXPORT_FORMATS:
+            return Response(
+                {"message": f"output must be one of {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        orders = filter_date_range(request, self.filter_queryset(self.get_queryset()))
+        # the body streams after ReplicaRoutingMiddleware has returned, so
+        # pick the database while the request may still read from a replica
+        orders = orders.using(router.db_for_read(orders.model))
+        stream, content_type, extension = EXPORT_FORMATS[output]
+        response = StreamingHttpResponse(
+            stream(export_rows(orders)), content_type=content_type
+        )
+        response["Content-Disposition"] = f'attachment; filename="orders.{extension}"'
+        return response
+
+
+class OrderStreamView(View):
+    """
+    Server-sent events with the changes to a delivery crew's orders, or to
+    every order for managers, pushed from the outbox instead of polled from
+    /api/orders. The stream stays open, so it needs an ASGI server, and
+    Django 4.2 or later for the async streaming response.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            user, channel = await sync_to_async(stream_subscriber)(request)
+        except APIException as error:
+            return JsonResponse({"detail": error.detail}, status=error.status_code)
+
+        response = StreamingHttpResponse(
+            order_stream(user, channel), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        # don't let nginx buffer the events
+        response["X-Accel-Buffering"] = "no"
+        return response